@@ -0,0 +1,258 @@
+import mmap
+import os.path
+import struct
+import sys
+import pygame
+
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+GRAPHICS_DIR = os.path.join(scriptDir, "graphics")
+CACHE_PATH = os.path.join(scriptDir, "asset_cache.bin")
+
+#sources bigger than this are shrunk once when loaded so we don't keep huge decoded images around
+MAX_SOURCE_SIZE = 1024
+ATLAS_WIDTH = 1024
+ATLAS_PADDING = 1 #empty pixels between atlas entries so scaled neighbours never bleed into each other
+
+#every scaled image the game asks for, written to the cache file by the build step
+PREBUILT_SIZES = {
+    "Icon_Food.png": [(75, 75)],
+    "Icon_Cart.png": [(75, 75)],
+    "Icon_Hanger.png": [(75, 75)],
+    "Icon_Stats.png": [(75, 75)],
+    "snakey.png": [(400, 400), (20, 20)],
+}
+
+#cache file layout: header, then one entry per image, then raw RGBA pixels
+#an entry is the name (length prefixed utf-8) followed by CACHE_ENTRY
+CACHE_MAGIC = b"PPAC"
+CACHE_VERSION = 1 #bump when the layout or the way images are scaled changes
+CACHE_HEADER = struct.Struct("<4sHI") #magic, version, entry count
+CACHE_NAME = struct.Struct("<H") #name length
+CACHE_ENTRY = struct.Struct("<HHqqQQ") #width, height, source mtime_ns, source size, pixel offset, pixel length
+
+#a group of images packed into one surface, entries are subsurfaces sharing its pixels
+class Atlas:
+    def __init__(self, surface, rects):
+        """
+        args:
+            surface - the packed surface
+            rects - dict of name -> Rect of that image inside surface
+        """
+        self.surface = surface
+        self.rects = rects
+        self.images = {name: surface.subsurface(rect) for name, rect in rects.items()}
+
+    def __getitem__(self, name):
+        return self.images[name]
+
+    def __contains__(self, name):
+        return name in self.images
+
+#loads images from graphics/ once per process and keeps display format copies of every size asked for
+#needs pygame.display.set_mode to have been called, since convert needs the display's pixel format
+class AssetManager:
+    def __init__(self, directory=GRAPHICS_DIR):
+        self.directory = directory
+        self.sources = {} #name -> converted image at (at most MAX_SOURCE_SIZE) source size
+        self.scaled = {} #(name, size) -> converted image
+        self.atlases = {} #key -> Atlas
+
+    def names(self):
+        #every image file in the graphics folder
+        return sorted(name for name in os.listdir(self.directory) if name.lower().endswith(".png"))
+
+    def source(self, name):
+        #decodes an image the first time it is asked for
+        image = self.sources.get(name)
+        if image is None:
+            image = load_source(os.path.join(self.directory, name)).convert_alpha()
+            self.sources[name] = image
+        return image
+
+    def get(self, name, size=None):
+        #returns the image scaled to size (width, height), or at source size if size is None
+        if size is None:
+            return self.source(name)
+        key = (name, tuple(size))
+        image = self.scaled.get(key)
+        if image is None:
+            image = pygame.transform.scale(self.source(name), key[1]).convert_alpha()
+            self.scaled[key] = image
+        return image
+
+    def load_all(self, sizes=None):
+        #decodes everything in graphics/ up front, sizes is an optional dict of name -> list of sizes to prepare
+        for name in self.names():
+            self.source(name)
+            for size in (sizes or {}).get(name, ()):
+                self.get(name, size)
+
+    def atlas(self, key, names, size=None):
+        #packs the named images (scaled to size) into one surface, built once per key
+        atlas = self.atlases.get(key)
+        if atlas is None:
+            images = [(name, self.get(name, size)) for name in names]
+            rects = pack_shelves([image.get_size() for _, image in images])
+            width = max(rect.right for rect in rects)
+            height = max(rect.bottom for rect in rects)
+            surface = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+            surface.fill((0, 0, 0, 0))
+            for (_, image), rect in zip(images, rects):
+                surface.blit(image, rect)
+            atlas = Atlas(surface, {name: rect for (name, _), rect in zip(images, rects)})
+            self.atlases[key] = atlas
+        return atlas
+
+    def has(self, name):
+        #whether the image can be had without decoding its file
+        return name in self.sources or any(key[0] == name for key in self.scaled)
+
+    def preload(self, worker, names, tag="asset"):
+        #decodes images on an io_worker.IOWorker thread, skipping ones that are already loaded
+        #each result comes back as an IO_DONE event that has to be passed to add_loaded on the main thread
+        for name in names:
+            if self.has(name):
+                continue
+            worker.submit(load_named_source, self.directory, name, key=("asset", name), tag=tag)
+
+    def add_loaded(self, result):
+        #takes a (name, image) decoded by preload and converts it, which has to happen on the main thread
+        name, image = result
+        if name not in self.sources:
+            self.sources[name] = image.convert_alpha()
+
+    def clear(self):
+        self.sources.clear()
+        self.scaled.clear()
+        self.atlases.clear()
+
+    def load_cache(self, path=CACHE_PATH):
+        #fills the scaled image cache from a file made by build_cache, skipping entries whose source changed
+        #returns how many images came from the file, 0 if it is missing, damaged or from another version
+        try:
+            file = open(path, "rb")
+        except OSError:
+            return 0
+        with file:
+            try:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return 0 #empty file
+        with data:
+            view = memoryview(data)
+            try:
+                loaded = self.read_cache(view)
+            except (ValueError, struct.error):
+                #damaged file, everything is loaded from graphics/ instead
+                loaded = 0
+            finally:
+                view.release()
+        return loaded
+
+    def read_cache(self, view):
+        #raises ValueError or struct.error if the file is damaged, nothing is loaded from a damaged file
+        if len(view) < CACHE_HEADER.size:
+            return 0
+        magic, version, count = CACHE_HEADER.unpack_from(view, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            return 0
+        #the whole table is checked before any pixels are used
+        entries = []
+        at = CACHE_HEADER.size
+        for _ in range(count):
+            (name_length,) = CACHE_NAME.unpack_from(view, at)
+            at += CACHE_NAME.size
+            if at + name_length > len(view):
+                raise ValueError("cache entry name runs past the end of the file")
+            name = bytes(view[at:at + name_length]).decode("utf-8") #UnicodeDecodeError is a ValueError
+            at += name_length
+            width, height, mtime_ns, source_size, offset, length = CACHE_ENTRY.unpack_from(view, at)
+            at += CACHE_ENTRY.size
+            if not width or not height or offset + length > len(view) or length != width * height * 4:
+                raise ValueError("cache entry %r has bad pixel data" % name)
+            entries.append((name, width, height, mtime_ns, source_size, offset, length))
+        loaded = 0
+        for name, width, height, mtime_ns, source_size, offset, length in entries:
+            if source_stamp(os.path.join(self.directory, name)) != (mtime_ns, source_size):
+                continue
+            #convert_alpha copies the pixels out, so nothing keeps pointing into the mapped file
+            pixels = view[offset:offset + length]
+            image = pygame.image.frombuffer(pixels, (width, height), "RGBA").convert_alpha()
+            del pixels
+            self.scaled[(name, (width, height))] = image
+            loaded += 1
+        return loaded
+
+def source_stamp(path):
+    #what a cache entry is checked against, (mtime_ns, size) or None if the file is gone
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def load_source(path):
+    #decodes an image file, shrinking it if it is bigger than MAX_SOURCE_SIZE
+    image = pygame.image.load(path)
+    width, height = image.get_size()
+    if max(width, height) > MAX_SOURCE_SIZE:
+        shrink = MAX_SOURCE_SIZE / max(width, height)
+        image = pygame.transform.scale(image, (max(1, round(width * shrink)), max(1, round(height * shrink))))
+    return image
+
+def load_named_source(directory, name):
+    #load_source for a worker thread, doesn't touch the display so it is safe off the main thread
+    return name, load_source(os.path.join(directory, name))
+
+def build_cache(path=CACHE_PATH, sizes=PREBUILT_SIZES, directory=GRAPHICS_DIR):
+    #offline build step: scales every image in sizes the same way AssetManager.get does and writes the raw pixels
+    #works without a display, and replaces the old file in one step so a running game never sees half a file
+    entries = []
+    pixels = []
+    for name, name_sizes in sorted(sizes.items()):
+        source_path = os.path.join(directory, name)
+        source = load_source(source_path)
+        mtime_ns, source_size = source_stamp(source_path)
+        for size in name_sizes:
+            image = pygame.transform.scale(source, size)
+            pixels.append(pygame.image.tostring(image, "RGBA"))
+            entries.append((name.encode("utf-8"), size, mtime_ns, source_size))
+
+    table_size = CACHE_HEADER.size + sum(CACHE_NAME.size + len(name) + CACHE_ENTRY.size for name, *_ in entries)
+    table = [CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(entries))]
+    offset = table_size
+    for (name, size, mtime_ns, source_size), data in zip(entries, pixels):
+        table.append(CACHE_NAME.pack(len(name)) + name)
+        table.append(CACHE_ENTRY.pack(size[0], size[1], mtime_ns, source_size, offset, len(data)))
+        offset += len(data)
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.writelines(table)
+        file.writelines(pixels)
+    os.replace(temp_path, path)
+    return len(entries)
+
+def pack_shelves(sizes, max_width=ATLAS_WIDTH, padding=ATLAS_PADDING):
+    #places rectangles left to right in rows ("shelves"), tallest first, returns Rects in the order of sizes
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i][1], reverse=True)
+    rects = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in order:
+        width, height = sizes[i]
+        if x and x + width > max_width:
+            x = 0
+            y += shelf_height + padding
+            shelf_height = 0
+        rects[i] = pygame.Rect(x, y, width, height)
+        x += width + padding
+        shelf_height = max(shelf_height, height)
+    return rects
+
+#shared by every screen so each image is only loaded once
+assets = AssetManager()
+
+#python assets.py builds the cache file
+if __name__ == "__main__":
+    count = build_cache(sys.argv[1] if len(sys.argv) > 1 else CACHE_PATH)
+    print("cached", count, "images")
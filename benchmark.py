@@ -0,0 +1,197 @@
+import os
+
+#no window needed, this has to be set before pygame starts up the display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import pygame
+import main
+from snake_logic import SnakeSim, greedy_policy
+from snake_render import load_snake_image, draw_snake, draw_food, BoardRenderer
+
+#rendering benchmarks for main.py and the snake mini-game
+#python benchmark.py --save-baseline stores this machine's numbers, later runs are compared against them
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(scriptDir, "benchmark_baseline.json")
+FRAMES = 600
+TOLERANCE = 0.10 #fps may drop this much below the baseline before it counts as slower
+SNAKE_LENGTH = 300
+SNAKE_FRAMES_PER_TICK = 6 #60 FPS drawing a 10 tick per second snake
+
+#each benchmark sets itself up and returns a function that draws one frame, frame i of the run
+
+def title_screen(screen):
+    #the title screen the game runs, already drawn once like it is after entering it
+    title = main.TitleScreen(screen)
+    title.draw()
+    return title
+
+def mouse_motion(pos):
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))
+
+def bench_title_screen(screen):
+    #the mouse moving around over empty space, nothing changes so nothing should be drawn
+    title = title_screen(screen)
+    def frame(i):
+        title.handle_event(mouse_motion((i % 50, 10)))
+        title.draw()
+    return frame
+
+def bench_ui_hover(screen):
+    #moves the mouse on and off the start button every frame
+    title = title_screen(screen)
+    inside = title.buttons[0].rect.center
+    def frame(i):
+        title.handle_event(mouse_motion(inside if i % 2 else (0, 0)))
+        title.draw()
+    return frame
+
+def bench_pet_screen_idle(screen):
+    game = main.Game(screen)
+    game.draw_everything()
+    def frame(i):
+        game.draw_everything()
+    return frame
+
+def bench_pet_screen_full(screen):
+    #every frame repaints the whole screen, like draw_everything did before dirty rects
+    game = main.Game(screen)
+    def frame(i):
+        game.mark_dirty()
+        game.draw_everything()
+    return frame
+
+def bench_snake_draw(screen):
+    sim = snake_of_length(SNAKE_LENGTH)
+    snake_image = load_snake_image()
+    def frame(i):
+        screen.fill((0, 0, 0))
+        draw_snake(screen, snake_image, sim.snake)
+        draw_food(screen, sim.food)
+        pygame.display.flip()
+    return frame
+
+def bench_snake_board(screen):
+    #the long snake chasing its food through the board renderer, ticking every few frames like the real game
+    sim = snake_of_length(SNAKE_LENGTH)
+    board = BoardRenderer(screen, load_snake_image())
+    state = {"sim": sim, "previous": (sim.snake.head, sim.snake.tail)}
+    def frame(i):
+        sim = state["sim"]
+        if i % SNAKE_FRAMES_PER_TICK == 0:
+            state["previous"] = (sim.snake.head, sim.snake.tail)
+            if not sim.step(greedy_policy(sim)):
+                sim = state["sim"] = snake_of_length(SNAKE_LENGTH)
+                state["previous"] = (sim.snake.head, sim.snake.tail)
+        alpha = (i % SNAKE_FRAMES_PER_TICK) / SNAKE_FRAMES_PER_TICK
+        pygame.display.update(board.draw(sim, state["previous"], alpha))
+    return frame
+
+def snake_of_length(length):
+    #a snake zig-zagging across the board from the top left, with food placed after it
+    sim = SnakeSim(seed=0)
+    body = sim.snake
+    while len(body):
+        body.pop_tail()
+    for n in range(length):
+        row, col = divmod(n, body.cols)
+        if row % 2:
+            col = body.cols - 1 - col
+        body.push_head(body.index((col, row)))
+    sim.food = body.random_free_cell(sim.rng)
+    return sim
+
+BENCHMARKS = {
+    "title_screen": bench_title_screen,
+    "ui_hover": bench_ui_hover,
+    "pet_screen_idle": bench_pet_screen_idle,
+    "pet_screen_full": bench_pet_screen_full,
+    "snake_draw": bench_snake_draw,
+    "snake_board": bench_snake_board,
+}
+
+def run_benchmark(name, frames=FRAMES):
+    #times the frames first, then runs them again under tracemalloc for the memory numbers
+    screen = pygame.display.set_mode((main.WIDTH, main.HEIGHT) if not name.startswith("snake") else (800, 600))
+    frame = BENCHMARKS[name](screen)
+    frame(0) #warm up caches so the first frame isn't measured
+
+    start = time.perf_counter()
+    for i in range(frames):
+        frame(i)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    allocated = 0
+    blocks_before = sys.getallocatedblocks()
+    for i in range(frames):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        frame(i)
+        _, frame_peak = tracemalloc.get_traced_memory()
+        allocated += frame_peak - before
+    blocks = sys.getallocatedblocks() - blocks_before
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "frames": frames,
+        "fps": frames / seconds if seconds else float("inf"),
+        "ms_per_frame": seconds * 1000 / frames,
+        "alloc_bytes_per_frame": allocated / frames, #highest extra memory in use during a frame, averaged
+        "blocks_kept_per_frame": blocks / frames, #objects still alive after the frame, should be ~0
+        "peak_traced_kb": peak / 1024,
+    }
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    #returns (name, result fps, baseline fps) for every benchmark that got slower than the baseline allows
+    slower = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old and result["fps"] < old["fps"] * (1 - tolerance):
+            slower.append((name, result["fps"], old["fps"]))
+    return slower
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description="Rendering benchmarks under the dummy video driver.")
+    parser.add_argument("names", nargs="*", help="benchmarks to run, all of them by default: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    pygame.init()
+    results = {name: run_benchmark(name, args.frames) for name in args.names or BENCHMARKS}
+    pygame.quit()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    print("%-18s %10s %10s %14s %12s" % ("benchmark", "fps", "baseline", "alloc B/frame", "peak KB"))
+    for name, result in results.items():
+        old = baseline.get(name, {}).get("fps")
+        print("%-18s %10.1f %10s %14.0f %12.1f" % (name, result["fps"], "%.1f" % old if old else "-",
+                                                   result["alloc_bytes_per_frame"], result["peak_traced_kb"]))
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2)
+        print("saved baseline to", args.baseline)
+        return 0
+
+    slower = compare(results, baseline, args.tolerance)
+    for name, fps, old_fps in slower:
+        print("SLOWER: %s %.1f fps vs %.1f baseline" % (name, fps, old_fps))
+    return 1 if slower else 0
+
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
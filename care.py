@@ -0,0 +1,101 @@
+import time
+from collections import namedtuple
+
+#the pet's needs going down over time, stepped on a fixed clock that has nothing to do with the frame rate
+#needs are whole numbers of thousandths of a point so a long catch up gives exactly what stepping would
+TICK_SECONDS = 60 #one logical tick per minute
+UNITS = 1000 #units in one care point
+MAX_NEED = 100 * UNITS
+
+#how much each need drops per tick, in thousandths of a point
+CareRates = namedtuple("CareRates", [
+    "hunger", #fullness lost per tick
+    "happiness", #happiness lost per tick
+    "health", #health lost per tick no matter what
+    "starving_health", #extra health lost per tick while the pet is starving (hunger at 0)
+])
+#hunger empties in about a day, happiness in about a day and a half
+DEFAULT_RATES = CareRates(hunger=70, happiness=46, health=2, starving_health=150)
+
+#frozen copy of a meter's needs, safe to hand to another thread
+CareState = namedtuple("CareState", ["hunger", "happiness", "health", "last_update"])
+
+def ceil_div(a, b):
+    return -(-a // b)
+
+class CareMeter:
+    def __init__(self, hunger=MAX_NEED, happiness=MAX_NEED, health=MAX_NEED, rates=DEFAULT_RATES,
+                 tick_seconds=TICK_SECONDS, last_update=None):
+        """
+        args:
+            hunger, happiness, health - starting needs in thousandths of a point (0 to MAX_NEED)
+            rates - CareRates used every tick
+            tick_seconds - real seconds in one logical tick
+            last_update - wall clock time (time.time()) the needs were last brought up to date, defaults to now
+        """
+        self.hunger = hunger
+        self.happiness = happiness
+        self.health = health
+        self.rates = rates
+        self.tick_seconds = tick_seconds
+        self.last_update = time.time() if last_update is None else last_update
+        self.ticks = 0 #ticks run since this meter was made
+
+    @property
+    def care(self):
+        #the overall care meter, 0 to 100
+        return (self.hunger + self.happiness + self.health) / (3 * UNITS)
+
+    def snapshot(self):
+        return CareState(self.hunger, self.happiness, self.health, self.last_update)
+
+    def step(self):
+        #one tick the slow way, advance() must always end up in the same place
+        starving = self.hunger == 0
+        self.hunger = max(0, self.hunger - self.rates.hunger)
+        self.happiness = max(0, self.happiness - self.rates.happiness)
+        self.health = max(0, self.health - self.rates.health - (self.rates.starving_health if starving else 0))
+        self.ticks += 1
+
+    def advance(self, ticks):
+        #runs any number of ticks at once in closed form
+        #every need only goes down, so clamping at 0 once at the end is the same as clamping every tick
+        if ticks <= 0:
+            return
+        rates = self.rates
+        #ticks that start with food in the belly, the rest are starving ticks
+        if self.hunger == 0:
+            fed_ticks = 0
+        elif rates.hunger == 0:
+            fed_ticks = ticks
+        else:
+            fed_ticks = min(ticks, ceil_div(self.hunger, rates.hunger))
+        starving_ticks = ticks - fed_ticks
+        self.hunger = max(0, self.hunger - rates.hunger * ticks)
+        self.happiness = max(0, self.happiness - rates.happiness * ticks)
+        self.health = max(0, self.health - rates.health * ticks - rates.starving_health * starving_ticks)
+        self.ticks += ticks
+
+    def update(self, now=None):
+        #brings the needs up to the wall clock time now (defaults to the current time)
+        #works the same after a frame or after days away, leftover time waits for the next call
+        if now is None:
+            now = time.time()
+        elapsed = now - self.last_update
+        if elapsed < 0:
+            #the clock went backwards, start counting again from here
+            self.last_update = now
+            return 0
+        ticks = int(elapsed // self.tick_seconds)
+        self.advance(ticks)
+        self.last_update += ticks * self.tick_seconds
+        return ticks
+
+    def feed(self, points):
+        self.hunger = min(MAX_NEED, self.hunger + int(points * UNITS))
+
+    def cheer(self, points):
+        self.happiness = min(MAX_NEED, self.happiness + int(points * UNITS))
+
+    def heal(self, points):
+        self.health = min(MAX_NEED, self.health + int(points * UNITS))
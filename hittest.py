@@ -0,0 +1,67 @@
+#finds what is under the mouse without checking every element on the screen
+#rects are filed into a uniform grid of cells, a lookup only looks at the few rects sharing the mouse's cell
+HIT_CELL_SIZE = 64
+
+class HitGrid:
+    def __init__(self, cell_size=HIT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {} #(col, row) -> list of items whose rect touches that cell
+        self.rects = {} #item -> rect it was added with
+        self.order = {} #item -> when it was added, later items are on top
+        self.added = 0
+        self.hovered = None
+
+    def cells_for(self, rect):
+        size = self.cell_size
+        for col in range(rect.left // size, (rect.right - 1) // size + 1):
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield (col, row)
+
+    def add(self, item, rect):
+        #items can be anything hashable, adding one again moves it
+        if item in self.rects:
+            self.remove(item)
+        self.rects[item] = rect
+        self.order[item] = self.added
+        self.added += 1
+        for cell in self.cells_for(rect):
+            self.cells.setdefault(cell, []).append(item)
+
+    def remove(self, item):
+        rect = self.rects.pop(item)
+        del self.order[item]
+        for cell in self.cells_for(rect):
+            items = self.cells[cell]
+            items.remove(item)
+            if not items:
+                del self.cells[cell]
+        if self.hovered is item:
+            self.hovered = None
+
+    def clear(self):
+        self.cells.clear()
+        self.rects.clear()
+        self.order.clear()
+        self.hovered = None
+
+    def hit(self, pos, test=None):
+        #returns the topmost item whose rect holds pos, or None
+        #test(item, pos) can turn down an item, eg one whose real shape is smaller than its rect
+        items = self.cells.get((pos[0] // self.cell_size, pos[1] // self.cell_size))
+        if not items:
+            return None
+        best = None
+        for item in items:
+            if self.rects[item].collidepoint(pos) and (best is None or self.order[item] > self.order[best]):
+                if test is None or test(item, pos):
+                    best = item
+        return best
+
+    def hover(self, pos, test=None):
+        #call when the mouse moves, returns (old, new) hovered items if that changed, otherwise None
+        item = self.hit(pos, test)
+        if item is self.hovered:
+            return None
+        old = self.hovered
+        self.hovered = item
+        return old, item
@@ -0,0 +1,80 @@
+import queue
+import sys
+import threading
+import pygame
+
+#a background thread for disk work (saving, decoding images) so slow storage never holds up a frame
+#finished jobs that asked for it post an IO_DONE event with tag, result and error attributes
+#errors from jobs without a tag (most saves) are printed here, since nothing else would ever see them
+IO_DONE = pygame.event.custom_type()
+IO_QUEUE_SIZE = 64
+STOP = object()
+
+class IOWorker:
+    def __init__(self, max_jobs=IO_QUEUE_SIZE):
+        """
+        args:
+            max_jobs - most jobs that can wait at once, submit refuses more instead of blocking the caller
+        """
+        self.keys = queue.Queue(maxsize=max_jobs)
+        self.jobs = {} #key -> (func, args, tag), the latest job for each key
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="io-worker", daemon=True)
+            self.thread.start()
+
+    def submit(self, func, *args, key=None, tag=None):
+        """
+        queues func(*args) to run on the worker thread, returns False if the queue is full
+
+        args:
+            key - jobs with the same key replace each other while they wait, so only the newest runs
+            tag - post an IO_DONE event with this tag when the job is done, None for no event
+        """
+        self.start()
+        job = (func, args, tag)
+        with self.lock:
+            if key is not None and key in self.jobs:
+                self.jobs[key] = job
+                return True
+            if key is None:
+                key = object()
+            self.jobs[key] = job
+        try:
+            self.keys.put_nowait(key)
+        except queue.Full:
+            with self.lock:
+                del self.jobs[key]
+            return False
+        return True
+
+    def run(self):
+        while True:
+            key = self.keys.get()
+            if key is STOP:
+                return
+            with self.lock:
+                func, args, tag = self.jobs.pop(key)
+            result = error = None
+            try:
+                result = func(*args)
+            except Exception as exc:
+                error = exc
+                if tag is None:
+                    print("background job failed:", getattr(func, "__qualname__", func), repr(exc), file=sys.stderr)
+            if tag is not None and pygame.display.get_init():
+                pygame.event.post(pygame.event.Event(IO_DONE, tag=tag, result=result, error=error))
+
+    def stop(self):
+        #runs every job still waiting, then ends the thread
+        if self.thread is None:
+            return
+        self.keys.put(STOP)
+        self.thread.join()
+        self.thread = None
+
+#shared by everything that touches the disk while the game is running
+io_worker = IOWorker()
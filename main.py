@@ -2,9 +2,19 @@ import os.path
 import pygame
 import pygame.freetype
 import sys
+from collections import OrderedDict
 from pygame.sprite import Sprite
 from pygame.rect import Rect
 from enum import Enum
+from assets import assets
+from care import CareMeter
+from profiler import profiler
+from savegame import SaveStore
+from io_worker import io_worker, IO_DONE
+from hittest import HitGrid
+from shop_grid import VirtualGrid, CATALOG
+from pet_sprite import PetCompositor, PET_IMAGE
+from minigame import minigames
 
 scriptDir = os.path.dirname(os.path.abspath(__file__))
 
@@ -14,12 +24,67 @@ BROWN = (125, 110, 79)
 WIDTH = 500
 HEIGHT = 500
 
+TEXT_FONT = "Courier"
+TEXT_CACHE_SIZE = 128
+
+#shared fonts + rendered text so menus don't rescan system fonts every time they are built
+class TextCache:
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        """
+        args:
+            max_size - how many rendered surfaces to keep before dropping the least recently used one
+        """
+        self.max_size = max_size
+        self.fonts = {} #(name, bold) -> freetype font, sizes are picked at render time
+        self.surfaces = OrderedDict() #(text, size, fg, bg, style) -> surface, oldest first
+        self.hits = 0
+        self.misses = 0
+
+    def get_font(self, name=TEXT_FONT, bold=True):
+        #returns the registered font, only looking it up in the system the first time
+        key = (name, bold)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.freetype.SysFont(name, 0, bold=bold)
+            self.fonts[key] = font
+        return font
+
+    def render(self, text, font_size, text_rgb, bg_rgb, bold=True):
+        #returns a surface with text written on, rendering it only on a cache miss
+        #the surface is shared between callers so it must not be drawn on
+        key = (text, font_size, color_key(text_rgb), color_key(bg_rgb), bold)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        font = self.get_font(bold=bold)
+        surface, _ = font.render(text=text, fgcolor=text_rgb, bgcolor=bg_rgb, size=font_size)
+        surface = surface.convert_alpha()
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        #drops rendered surfaces (eg after the display is recreated) but keeps the fonts
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+def color_key(color):
+    #colours can be names, tuples or pygame.Color, so turn them into something hashable
+    if color is None:
+        return None
+    return tuple(pygame.Color(color))
+
+text_cache = TextCache()
+
 #used for the title screen
 def create_surface_with_text(text, font_size, text_rgb, bg_rgb):
     #returns surface with text written on
-    font = pygame.freetype.SysFont("Courier", font_size, bold=True)
-    surface, _ = font.render(text=text, fgcolor=text_rgb, bgcolor=bg_rgb)
-    return surface.convert_alpha()
+    return text_cache.render(text, font_size, text_rgb, bg_rgb)
 
 #text buttons in title screen
 class UIElement(Sprite):
@@ -35,6 +100,7 @@ class UIElement(Sprite):
             action - the gamestate change associated with this button
         """
         self.mouse_over = False #indicates if the mouse is over the element
+        self.needs_redraw = True #the element looks different from when it was last drawn
         #create the default image
         default_image = create_surface_with_text(
             text=text, font_size=font_size, text_rgb=text_rgb, bg_rgb=bg_rgb
@@ -60,17 +126,21 @@ class UIElement(Sprite):
     @property
     def rect(self):
         return self.rects[1] if self.mouse_over else self.rects[0]
-    def update(self, mouse_pos, mouse_up):
-        #updates the elemtn's appearance depending on the mouse position and returns the button's action if clicked
-        if self.rect.collidepoint(mouse_pos):
-            self.mouse_over = True
-            if mouse_up:
-                return self.action
-        else:
-            self.mouse_over = False
+    @property
+    def area(self):
+        #everything the element can cover, highlighted or not
+        return self.rects[0].union(self.rects[1])
+    def set_mouse_over(self, mouse_over):
+        #changes the hover state, returns True if that changed how the element looks
+        if mouse_over == self.mouse_over:
+            return False
+        self.mouse_over = mouse_over
+        self.needs_redraw = True
+        return True
     def draw(self, surface):
         #draws element onto a surface
         surface.blit(self.image, self.rect)
+        self.needs_redraw = False
 
 #for icons in screen w snake
 class Button:
@@ -81,27 +151,182 @@ class Button:
         self.rect = self.image.get_rect()
         self.image_rect = pygame.Rect(x - self.rect.width/2, y - self.rect.height/2, self.rect.width, self.rect.height)
 
+#decides when a loop should wake up, so menus don't spin a core while nothing happens
+IDLE_TIMEOUT = 1000 #longest time (ms) to sleep in event.wait before running a frame anyway
+ACTIVE_LINGER = 250 #how long (ms) to keep running at full frame rate after the last event
+
+class FrameScheduler:
+    def __init__(self, fps=60, idle_timeout=IDLE_TIMEOUT, linger=ACTIVE_LINGER):
+        """
+        args:
+            fps - frame rate used while something is happening
+            idle_timeout - longest time in ms to block when idle
+            linger - ms to stay at full frame rate after input or a timer
+        """
+        self.fps = fps
+        self.idle_timeout = idle_timeout
+        self.linger = linger
+        self.clock = pygame.time.Clock()
+        self.animating = False #set while a screen has an animation running
+        self.active_until = 0
+
+    def enter(self, state):
+        #switches to the frame budget of a game state and starts awake so the first frame is drawn
+        self.fps = FRAME_BUDGETS.get(state, self.fps)
+        self.animating = False
+        self.wake()
+
+    def wake(self):
+        #ramps up to the full frame rate for a little while
+        self.active_until = pygame.time.get_ticks() + self.linger
+
+    def get_events(self):
+        #returns this frame's events, blocking on event.wait while idle instead of polling
+        if self.animating or pygame.time.get_ticks() < self.active_until:
+            self.clock.tick(self.fps)
+            events = pygame.event.get()
+        else:
+            event = pygame.event.wait(self.idle_timeout)
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events.extend(pygame.event.get())
+            #keeps the clock from reporting the sleep as one huge frame
+            self.clock.tick()
+        if events:
+            self.wake()
+        return events
+
+scheduler = FrameScheduler()
+
 #beginning game state
 def main():
     pygame.init()
     screen = pygame.display.set_mode((500, 500))
     pygame.display.set_caption("Python Pal")
-    game_state = GameState.TITLE
-    while True:
-        if game_state == GameState.TITLE:
-            game_state = title_screen(screen)
+    #pre-scaled images from "python assets.py", anything missing or stale is loaded from graphics/ instead
+    assets.load_cache()
+    store = SaveStore()
+    store.load()
+    #accessories bought so far and the coins to buy more, shared by the shop and the pet screen on this thread
+    owned = set(store.save.inventory)
+    wallet = Wallet(store)
+    screens = ScreenManager(screen, {
+        GameState.TITLE: TitleScreen,
+        GameState.NEWGAME: lambda surface: Game(surface, store, owned, wallet),
+        GameState.SHOP: lambda surface: ShopScreen(surface, store, owned=owned, wallet=wallet),
+    })
+    #decode the pet screen's images in the background while the title screen is up
+    assets.preload(io_worker, PET_SCREEN_IMAGES)
+    screens.run(GameState.TITLE)
+    #finish the saves still waiting, after that the store is back on this thread
+    io_worker.stop()
+    #fold the journal into the save file so the next start only reads one file
+    try:
+        store.compact()
+    finally:
+        store.close()
+    profiler.dump_if_requested()
+    pygame.quit()
 
-        if game_state == GameState.NEWGAME:
-            game_state = play(screen)
+#one thing the game can show, built once and kept alive between visits
+class Screen:
+    def enter(self):
+        #called every time the screen becomes the current one
+        pass
 
-        if game_state == GameState.CREDITS:
-            game_state = credits(screen)
+    def exit(self):
+        #called when another screen takes over
+        pass
 
-        if game_state == GameState.QUIT:
-            pygame.quit()
-            return
+    def handle_event(self, event):
+        #returns the GameState to switch to, or None to stay
+        return None
+
+    def update(self):
+        #runs once per frame after the events, returns the GameState to switch to, or None to stay
+        return None
+
+    def draw(self):
+        #draws and presents the frame
+        pass
 
-def title_screen(screen):
+    def asset_loaded(self, name):
+        #an image the screen may be waiting on finished loading in the background
+        pass
+
+#owns every screen and runs the one main loop, switching screens without rebuilding them
+class ScreenManager:
+    def __init__(self, surface, factories, lazy=True):
+        """
+        args:
+            surface - the display surface every screen draws on
+            factories - dict of GameState -> callable taking the surface and returning a Screen
+            lazy - only build a screen the first time it is visited, otherwise build them all now
+        """
+        self.surface = surface
+        self.factories = factories
+        self.screens = {} #GameState -> Screen, kept for the rest of the run
+        self.state = None
+        self.current = None
+        if not lazy:
+            for state in factories:
+                self.get(state)
+
+    def get(self, state):
+        screen = self.screens.get(state)
+        if screen is None:
+            screen = self.factories[state](self.surface)
+            self.screens[state] = screen
+        return screen
+
+    def switch(self, state):
+        if self.current is not None:
+            self.current.exit()
+        self.state = state
+        self.current = self.get(state)
+        scheduler.enter(state)
+        self.current.enter()
+
+    def run(self, state):
+        #runs until a screen asks for GameState.QUIT or the window is closed
+        self.switch(state)
+        while True:
+            profiler.begin_frame()
+            with profiler.phase("wait"):
+                events = scheduler.get_events()
+            for event in events:
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == IO_DONE:
+                    self.handle_io_done(event)
+                    continue
+                profiler.handle_event(event)
+                #a switch happens straight away, so the rest of the events go to the new screen
+                if not self.follow(self.current.handle_event(event)):
+                    return
+            with profiler.phase("update"):
+                next_state = self.current.update()
+            if not self.follow(next_state):
+                return
+            #the new screen draws in this same frame
+            self.current.draw()
+
+    def follow(self, next_state):
+        #acts on what a screen returned, returns False when the game should quit
+        if next_state == GameState.QUIT:
+            return False
+        if next_state is not None and next_state != self.state and next_state in self.factories:
+            self.switch(next_state)
+        return True
+
+    def handle_io_done(self, event):
+        #background jobs finishing, images still need converting on this thread
+        if event.error is not None:
+            print("background job failed:", event.tag, event.error, file=sys.stderr)
+        elif event.tag == "asset":
+            assets.add_loaded(event.result)
+            self.current.asset_loaded(event.result[0])
+
+def make_title_buttons():
     start_btn = UIElement(
         center_position=(250, 300),
         font_size=30,
@@ -120,107 +345,441 @@ def title_screen(screen):
         action=GameState.QUIT,
     )
 
-    buttons = [start_btn, quit_btn]
+    return [start_btn, quit_btn]
+
+#draws one frame of the title screen
+def draw_title_frame(screen, buttons):
+    screen.fill(PINK)
+
+    for button in buttons:
+        button.draw(screen)
+    profiler.draw_overlay(screen)
+
+#hover test for a UIElement, its highlighted rect is bigger than the normal one
+def element_under(element, pos):
+    return element.rect.collidepoint(pos)
+
+class TitleScreen(Screen):
+    def __init__(self, screen):
+        self.screen = screen
+        self.buttons = make_title_buttons()
+        #filed under their biggest (highlighted) rect, element_under then checks the current one
+        self.hit_grid = HitGrid()
+        for button in self.buttons:
+            self.hit_grid.add(button, button.rects[1])
+        self.full_redraw = True
+        self.overlay_shown = False
+
+    def enter(self):
+        #the mouse may have moved while another screen was up, and whatever was on screen has to go
+        self.hover(pygame.mouse.get_pos())
+        self.full_redraw = True
 
-    #main loop
-    while True:
-        mouse_up = False
-        for event in pygame.event.get():
-            if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                mouse_up = True
-            
-        screen.fill(PINK)
+    def hover(self, pos):
+        changed = self.hit_grid.hover(pos, element_under)
+        if changed is not None:
+            old, new = changed
+            if old is not None:
+                old.set_mouse_over(False)
+            if new is not None:
+                new.set_mouse_over(True)
 
-        for button in buttons:
-            ui_action = button.update(pygame.mouse.get_pos(), mouse_up)
-            if ui_action is not None:
-                return ui_action
-            button.draw(screen)
-        pygame.display.flip()
+    def handle_event(self, event):
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            #the window system lost our pixels, so repaint it all
+            self.full_redraw = True
+        #hover is only worked out again when the mouse moves
+        elif event.type == pygame.MOUSEMOTION:
+            self.hover(event.pos)
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.hover(event.pos)
+            if self.hit_grid.hovered is not None:
+                return self.hit_grid.hovered.action
+        return None
+
+    def draw(self):
+        #only buttons whose hover state changed are repainted, most frames draw nothing at all
+        if self.full_redraw or profiler.overlay or self.overlay_shown:
+            self.full_redraw = False
+            self.overlay_shown = profiler.overlay
+            with profiler.phase("draw"):
+                draw_title_frame(self.screen, self.buttons)
+            with profiler.phase("present"):
+                pygame.display.flip()
+            return
+        areas = [button.area for button in self.buttons if button.needs_redraw]
+        if not areas:
+            return
+        with profiler.phase("draw"):
+            for area in areas:
+                self.screen.set_clip(area)
+                self.screen.fill(PINK, area)
+                for button in self.buttons:
+                    if button.area.colliderect(area):
+                        button.draw(self.screen)
+            self.screen.set_clip(None)
+        with profiler.phase("present"):
+            pygame.display.update(areas)
+
+#the player's coins, one count on this thread shared by every screen that earns or spends them
+#once the game is running the store belongs to the io worker thread, so every change is saved through it
+class Wallet:
+    def __init__(self, store=None):
+        """
+        args:
+            store - savegame.SaveStore the balance is read from and saved to, None for a wallet that isn't saved
+        """
+        self.store = store
+        self.coins = store.save.coins if store is not None else 0
+
+    def earn(self, coins):
+        #returns whether the coins were added, nothing changes if the save can't be queued
+        if coins <= 0:
+            return True
+        if self.store is not None and not io_worker.submit(self.store.record_coins, self.coins + coins):
+            return False
+        self.coins += coins
+        return True
+
+    def spend(self, price, item=None):
+        #pays price, and saves item as bought in the same journal job if there is one
+        #returns whether it was paid, nothing changes if there aren't enough coins or the save can't be queued
+        if price > self.coins:
+            return False
+        balance = self.coins - price
+        if self.store is not None:
+            if item is None:
+                queued = io_worker.submit(self.store.record_coins, balance)
+            else:
+                queued = io_worker.submit(self.store.buy_item, item, balance)
+            if not queued:
+                return False
+        self.coins = balance
+        return True
 
 #everything to do w the actual game vv
-class Game:
-    def __init__(self):
+PET_SCREEN_ICONS = ["Icon_Food.png", "Icon_Cart.png", "Icon_Hanger.png", "Icon_Stats.png"]
+PET_SCREEN_IMAGES = PET_SCREEN_ICONS + [PET_IMAGE]
+FOOD_CARE = 10 #hunger points one click on the food icon gives back
+MINIGAME_COINS_PER_POINT = 1 #coins paid for every point scored in a mini-game round
+
+class Game(Screen):
+    def __init__(self, screen=None, store=None, owned=None, wallet=None):
         self.width = 500
         self.height = 500
         self.background_color = "PINK"
         self.buttons_bar_height = 100
         self.buttons_bar_color = "orange"
+        self.bar_area = pygame.Rect(0, 0, self.width, self.buttons_bar_height)
+        #mini-games are played under the buttons bar, in a subsurface of the screen
+        self.play_area = pygame.Rect(0, self.buttons_bar_height, self.width, self.height - self.buttons_bar_height)
+        self.minigame = None
+        self.minigame_name = None
+        self.minigame_launched = False #set for the frame a mini-game starts in, before its clock is running
 
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        pygame.display.set_caption("Python Pal")
-        self.clock_tick = 60
-        self.clock = pygame.time.Clock()
-        
-        
-        #icons
-        foodIcon = pygame.image.load(os.path.join(scriptDir, "graphics", "Icon_Food.png"))
-        foodIcon = pygame.transform.scale(foodIcon, (75, 75))
-        self.food_button = Button((self.width/8), self.buttons_bar_height/2, foodIcon)
-
-        cartIcon = pygame.image.load(os.path.join(scriptDir, "graphics", "Icon_Cart.png"))
-        cartIcon = pygame.transform.scale(cartIcon, (75, 75))
-        self.cart_button = Button((self.width/8 * 3), self.buttons_bar_height/2, cartIcon)
-        
-        hangerIcon = pygame.image.load(os.path.join(scriptDir, "graphics", "Icon_Hanger.png"))
-        hangerIcon = pygame.transform.scale(hangerIcon, (75, 75))
-        self.hanger_button = Button((self.width/8 * 5), self.buttons_bar_height/2, hangerIcon)
-        
-        statsIcon = pygame.image.load(os.path.join(scriptDir, "graphics", "Icon_Stats.png"))
-        statsIcon = pygame.transform.scale(statsIcon, (75, 75))
-        self.stats_button = Button((self.width/8 * 7), self.buttons_bar_height/2, statsIcon)
-
-
-        #snakey
-        snakeIcon = pygame.image.load(os.path.join(scriptDir, "graphics", "snakey.png"))
-        snakeIcon = pygame.transform.scale(snakeIcon, (400, 400))
-        self.snake_button = Button((250), 300, snakeIcon)
-
-    def draw_everything(self):
-        self.screen.fill(self.background_color)
-        pygame.draw.rect(self.screen, self.buttons_bar_color, pygame.Rect(0, 0, self.width, self.buttons_bar_height))
-        self.screen.blit(self.food_button.image, self.food_button.image_rect)
-        self.screen.blit(self.cart_button.image, self.cart_button.image_rect)
-        self.screen.blit(self.hanger_button.image, self.hanger_button.image_rect)
-        self.screen.blit(self.stats_button.image, self.stats_button.image_rect)
-        self.screen.blit(self.snake_button.image, self.snake_button.image_rect)
-
-        pygame.display.update()
-
-    def run(self):
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    return
-                
+        #draws on the main window when run from the screen manager, otherwise opens its own
+        if screen is None:
+            screen = pygame.display.set_mode((self.width, self.height))
+            pygame.display.set_caption("Python Pal")
+        self.screen = screen
+
+        #the pet's needs, they keep going down while the player is on other screens (or away from the game)
+        #without a savegame.SaveStore nothing is saved and every Game starts with a new pet
+        #once the game is running the store belongs to the io worker thread, so it is only read here
+        self.store = store
+        if store is not None:
+            save = store.save
+            self.care = CareMeter(save.hunger, save.happiness, save.health, last_update=save.last_update)
+        else:
+            self.care = CareMeter()
+
+        #icons, packed into one atlas that is only built the first time a Game is made
+        icons = assets.atlas("icons", PET_SCREEN_ICONS, (75, 75))
+        self.food_button = Button((self.width/8), self.buttons_bar_height/2, icons["Icon_Food.png"])
+        self.cart_button = Button((self.width/8 * 3), self.buttons_bar_height/2, icons["Icon_Cart.png"])
+        self.hanger_button = Button((self.width/8 * 5), self.buttons_bar_height/2, icons["Icon_Hanger.png"])
+        self.stats_button = Button((self.width/8 * 7), self.buttons_bar_height/2, icons["Icon_Stats.png"])
+
+        #snakey, baked together with whatever it is wearing onto the background colour so it is one opaque blit
+        self.owned = owned if owned is not None else set()
+        #coins come from mini-game rounds and are spent in the shop
+        self.wallet = wallet if wallet is not None else Wallet(store)
+        self.pet = PetCompositor((400, 400), background=self.background_color)
+        self.snake_button = Button((250), 300, self.pet.image())
+
+        #everything drawn on the pet screen, back to front
+        self.buttons = [self.food_button, self.cart_button, self.hanger_button, self.stats_button, self.snake_button]
+
+        #what clicking each icon does
+        self.hit_grid = HitGrid()
+        self.click_handlers = {
+            self.food_button: self.feed,
+            self.cart_button: self.open_shop,
+            self.hanger_button: self.open_wardrobe,
+            self.stats_button: self.open_stats,
+            self.snake_button: self.play_snake,
+        }
+        for button in self.click_handlers:
+            self.hit_grid.add(button, button.image_rect)
+
+        #static parts of the screen are painted once and used to erase dirty areas
+        self.background = pygame.Surface((self.width, self.height)).convert()
+        self.background.fill(self.background_color)
+        pygame.draw.rect(self.background, self.buttons_bar_color, pygame.Rect(0, 0, self.width, self.buttons_bar_height))
+
+        #areas that changed since the last frame, starts with the whole screen
+        self.dirty_rects = []
+        self.mark_dirty()
+        #strip along the top the profiler overlay is drawn in
+        self.overlay_area = pygame.Rect(0, 0, self.width, 20)
+        self.overlay_shown = False
+
+    def mark_dirty(self, rect=None):
+        #flags an area to be repainted next frame, no rect means the whole screen
+        if rect is None:
+            rect = self.screen.get_rect()
+            if self.minigame is not None:
+                self.minigame.invalidate()
+        self.dirty_rects.append(pygame.Rect(rect))
+
+    def draw_everything(self, drawn=()):
+        #only repaints and presents the areas that changed, idle frames do nothing
+        #drawn is any other areas already drawn this frame that need presenting too
+        if profiler.overlay or self.overlay_shown:
+            self.mark_dirty(self.overlay_area)
+        self.overlay_shown = profiler.overlay
+        if not self.dirty_rects and not drawn:
+            return
+        dirty = self.dirty_rects
+        self.dirty_rects = []
+        with profiler.phase("draw"):
+            for area in dirty:
+                self.screen.set_clip(area)
+                self.screen.blit(self.background, area, area)
+                for button in self.buttons:
+                    if button.image_rect.colliderect(area):
+                        self.screen.blit(button.image, button.image_rect)
+            self.screen.set_clip(None)
+            profiler.draw_overlay(self.screen)
+
+        with profiler.phase("present"):
+            pygame.display.update(dirty + list(drawn))
+
+    def enter(self):
+        #whatever screen came before drew over everything
+        self.mark_dirty()
+        #catch the needs up before any event is handled, a feed in the same batch as the switch
+        #must land on the current hunger, not the one from before the time away
+        if self.care.update():
+            self.save_care()
+
+    def exit(self):
+        self.stop_minigame()
+
+    def handle_event(self, event):
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            #the window system lost our pixels, so repaint it all
+            self.mark_dirty()
+        if self.minigame is not None:
+            #the mini-game gets every event until escape takes the player back to the pet
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                self.stop_minigame()
+            else:
+                self.minigame.handle_event(event)
+            return None
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            return GameState.TITLE
+        if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            button = self.hit_grid.hit(event.pos)
+            if button is not None:
+                return self.click_handlers[button]()
+        return None
+
+    #icon click handlers, each returns the GameState to switch to or None
+
+    def feed(self):
+        self.care.feed(FOOD_CARE)
+        self.save_care()
+        return None
+
+    def open_shop(self):
+        return GameState.SHOP
+
+    def open_wardrobe(self):
+        #no wardrobe screen yet, each click puts on the next owned accessory and then nothing again
+        choices = [()] + [(name,) for name in sorted(self.owned)]
+        current = choices.index(self.pet.outfit) if self.pet.outfit in choices else 0
+        self.dress(choices[(current + 1) % len(choices)])
+        return None
+
+    def dress(self, accessories):
+        #only re-bakes the pet when the outfit really changed
+        if self.pet.set_outfit(accessories):
+            self.snake_button.image = self.pet.image()
+            self.mark_dirty(self.snake_button.image_rect)
+
+    def open_stats(self):
+        #no stats screen yet
+        return None
+
+    def play_snake(self):
+        self.start_minigame("snake")
+        return None
+
+    def start_minigame(self, name):
+        #the mini-game is only loaded the first time it is played, later launches reuse it
+        self.minigame = minigames.get(name)
+        self.minigame_name = name
+        self.minigame.init(self.screen.subsurface(self.play_area))
+        self.minigame.invalidate()
+        self.minigame_launched = True
+        #keeps the frame rate up while the game runs instead of sleeping until the next event
+        scheduler.animating = True
+
+    def stop_minigame(self):
+        if self.minigame is None:
+            return
+        #the round's points are paid out however it ended
+        score = self.minigame.score
+        self.minigame.teardown()
+        self.wallet.earn(score * MINIGAME_COINS_PER_POINT)
+        if self.store is not None and score:
+            io_worker.submit(self.store.record_high_score, self.minigame_name, score)
+        self.minigame = None
+        scheduler.animating = False
+        self.mark_dirty(self.play_area)
+
+    def save_care(self):
+        if self.store is not None:
+            #written on the io thread, a newer care save replaces one that hasn't been written yet
+            io_worker.submit(self.store.record_care, self.care.snapshot(), key="care")
+
+    def update(self):
+        #runs whatever care ticks are due, a no-op most frames
+        if self.care.update():
+            self.save_care()
+        #mini-games run on the shared frame clock, the pet comes back once the game is over
+        #the frame a game starts in may have been spent asleep waiting for the click, so it gets no time
+        if self.minigame is not None:
+            dt = 0.0 if self.minigame_launched else scheduler.clock.get_time() / 1000
+            self.minigame_launched = False
+            if not self.minigame.update(dt):
+                self.stop_minigame()
+        return None
+
+    def draw(self):
+        if self.minigame is None:
             self.draw_everything()
-            self.clock.tick(self.clock_tick)
-            
-#running actual game
-def play(screen):
-    return_btn = UIElement(
-        center_position=(140, 570),
-        font_size=20,
-        bg_rgb=PINK,
-        text_rgb=BROWN,
-        text="Return to main menu",
-        action=GameState.TITLE,
-    )
-    game = Game()
-    game.run()
-    while True:
-        mouse_up = False
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                screen.fill(PINK)
-        ui_action = return_btn.update(pygame.mouse.get_pos(), mouse_up)
-        if ui_action is not None:
-            return ui_action
-        pygame.display.flip()
+            return
+        #the buttons bar is drawn as usual, everything under it belongs to the mini-game
+        self.dirty_rects = [rect.clip(self.bar_area) for rect in self.dirty_rects if rect.colliderect(self.bar_area)]
+        with profiler.phase("draw"):
+            drawn = [rect.move(self.play_area.topleft) for rect in self.minigame.draw()]
+        self.draw_everything(drawn)
+
+#accessory shop, opened from the cart icon
+SHOP_GRID_AREA = pygame.Rect(10, 60, 480, 430)
+SHOP_TILE_SIZE = (150, 130)
+SHOP_THUMBNAIL_SIZE = (80, 80)
+SHOP_TILE_COLOR = (245, 230, 247)
+SHOP_SCROLL_STEP = 40 #pixels per mouse wheel notch or arrow key press
+
+class ShopScreen(Screen):
+    def __init__(self, screen, store=None, catalog=CATALOG, owned=None, wallet=None):
+        self.screen = screen
+        self.store = store
+        self.catalog = catalog
+        #purchases are tracked on this thread and saved through the io worker
+        if owned is None:
+            owned = set(store.save.inventory) if store is not None else set()
+        self.owned = owned
+        self.wallet = wallet if wallet is not None else Wallet(store)
+        self.grid = VirtualGrid(SHOP_GRID_AREA, len(catalog), SHOP_TILE_SIZE, self.render_tile)
+        #items waiting on each thumbnail that is still loading
+        self.waiting = {}
+        self.full_redraw = True
+        self.overlay_shown = False
+
+    def render_tile(self, tile, index):
+        item = self.catalog[index]
+        tile.fill(SHOP_TILE_COLOR)
+        thumbnail_rect = pygame.Rect((0, 8), SHOP_THUMBNAIL_SIZE)
+        thumbnail_rect.centerx = tile.get_width() // 2
+        if assets.has(item.image):
+            tile.blit(assets.get(item.image, SHOP_THUMBNAIL_SIZE), thumbnail_rect)
+        else:
+            #drawn again when the image arrives from the io worker
+            self.waiting.setdefault(item.image, set()).add(index)
+            assets.preload(io_worker, [item.image])
+            pygame.draw.rect(tile, PINK, thumbnail_rect)
+        label = "owned" if item.name in self.owned else "%d coins" % item.price
+        for text, y in ((item.name, 96), (label, 114)):
+            text_image = create_surface_with_text(text, 13, BROWN, SHOP_TILE_COLOR)
+            tile.blit(text_image, text_image.get_rect(center=(tile.get_width() // 2, y)))
+
+    def asset_loaded(self, name):
+        for index in self.waiting.pop(name, ()):
+            self.grid.refresh(index)
+
+    def enter(self):
+        #thumbnails that finished loading while another screen was up never got to this one
+        for name in [name for name in self.waiting if assets.has(name)]:
+            self.asset_loaded(name)
+        #the header is drawn again with the wallet's balance, coins may have been earned since the last visit
+        self.full_redraw = True
+
+    def handle_event(self, event):
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            #the window system lost our pixels, so repaint it all
+            self.full_redraw = True
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                return GameState.NEWGAME
+            if event.key == pygame.K_DOWN:
+                self.grid.scroll_by(SHOP_SCROLL_STEP)
+            elif event.key == pygame.K_UP:
+                self.grid.scroll_by(-SHOP_SCROLL_STEP)
+            elif event.key == pygame.K_PAGEDOWN:
+                self.grid.scroll_by(self.grid.rect.height)
+            elif event.key == pygame.K_PAGEUP:
+                self.grid.scroll_by(-self.grid.rect.height)
+        elif event.type == pygame.MOUSEWHEEL:
+            self.grid.scroll_by(-event.y * SHOP_SCROLL_STEP)
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            index = self.grid.index_at(event.pos)
+            if index is not None:
+                self.buy(index)
+        return None
+
+    def buy(self, index):
+        #returns whether the item was bought, nothing changes if it can't be paid for or saved
+        item = self.catalog[index]
+        if item.name in self.owned or not self.wallet.spend(item.price, item.name):
+            return False
+        self.owned.add(item.name)
+        self.grid.refresh(index)
+        #the coin count in the header changed
+        self.full_redraw = True
+        return True
+
+    def draw(self):
+        #scrolling only repaints the grid, the header is drawn when the screen is entered
+        if self.full_redraw or profiler.overlay or self.overlay_shown:
+            self.full_redraw = False
+            self.overlay_shown = profiler.overlay
+            with profiler.phase("draw"):
+                self.screen.fill(PINK)
+                title = create_surface_with_text("Accessory Shop - %d coins" % self.wallet.coins, 24, BROWN, PINK)
+                self.screen.blit(title, title.get_rect(center=(WIDTH // 2, 30)))
+                self.grid.draw(self.screen, PINK)
+                profiler.draw_overlay(self.screen)
+            with profiler.phase("present"):
+                pygame.display.flip()
+        elif self.grid.changed:
+            with profiler.phase("draw"):
+                area = self.grid.draw(self.screen, PINK)
+            with profiler.phase("present"):
+                pygame.display.update(area)
 
 #end massive game chunk ^^
 class GameState(Enum):
@@ -228,6 +787,15 @@ class GameState(Enum):
     TITLE = 0
     NEWGAME = 1
     CREDITS = 2
+    SHOP = 3
+
+#frame rate each state runs at while it is active, idle screens sleep until an event arrives
+FRAME_BUDGETS = {
+    GameState.TITLE: 30,
+    GameState.NEWGAME: 60,
+    GameState.CREDITS: 30,
+    GameState.SHOP: 60,
+}
 
 #call main when the script is run
 if __name__ == "__main__":
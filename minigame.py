@@ -0,0 +1,55 @@
+import importlib
+
+#mini-games that run inside another screen, drawing into a surface the host owns
+#the host keeps the window, the clock and the asset cache, a mini-game only gets a surface and events
+#module and class of every mini-game, nothing is imported until the game is first launched
+MINI_GAMES = {
+    "snake": ("snake_minigame", "SnakeMiniGame"),
+}
+
+class MiniGame:
+    #what a host calls, in order: init once per launch, then handle_event/update/draw every frame, then teardown
+    score = 0 #points scored in the current round, read by the host before teardown to pay out coins
+    def init(self, surface):
+        #starts a new round drawing on surface (usually a subsurface of the display) until teardown
+        pass
+
+    def handle_event(self, event):
+        pass
+
+    def update(self, dt):
+        #moves the game on by dt seconds of the host's clock, returns False once the game is over
+        return True
+
+    def draw(self):
+        #draws the frame onto the surface and returns the rects that changed, relative to the surface
+        return []
+
+    def invalidate(self):
+        #the surface lost its pixels, draw all of it next frame
+        pass
+
+    def teardown(self):
+        #the round is over, the object is kept and init is called again on the next launch
+        pass
+
+class MiniGameLoader:
+    def __init__(self, registry=MINI_GAMES):
+        """
+        args:
+            registry - dict of name -> (module, class name) of the mini-games that can be launched
+        """
+        self.registry = registry
+        self.games = {} #name -> MiniGame, made on first launch and kept so later launches start straight away
+
+    def get(self, name):
+        #needs a display mode to be set first, mini-games load their images when they are made
+        game = self.games.get(name)
+        if game is None:
+            module_name, class_name = self.registry[name]
+            game = getattr(importlib.import_module(module_name), class_name)()
+            self.games[name] = game
+        return game
+
+#shared by everything that launches mini-games
+minigames = MiniGameLoader()
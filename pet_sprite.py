@@ -0,0 +1,77 @@
+from collections import OrderedDict
+import pygame
+from assets import assets
+
+#bakes the pet and everything it is wearing into one surface, so drawing it is a single blit
+PET_IMAGE = "snakey.png"
+PET_SIZE = (400, 400)
+OUTFIT_CACHE_SIZE = 8 #baked surfaces kept, each 400x400 one is ~640KB
+
+#where each accessory sits on the 400x400 pet: shop item name -> (image, rect)
+ACCESSORY_LAYOUT = {
+    "Heart Charm": ("Icon_Heart.png", pygame.Rect(230, 240, 60, 60)),
+    "Gold Medal": ("Icon_Award.png", pygame.Rect(170, 230, 70, 70)),
+    "Cosy House": ("Icon_Home.png", pygame.Rect(20, 20, 90, 90)),
+    "Diary": ("Icon_Writing.png", pygame.Rect(290, 40, 80, 80)),
+    "Full Battery": ("Icon_BatteryFull.png", pygame.Rect(300, 300, 60, 60)),
+    "Old Battery": ("Icon_BatteryLow.png", pygame.Rect(40, 300, 60, 60)),
+}
+
+#offset of the whole pet in each animation frame, only a still frame for now
+FRAME_OFFSETS = [(0, 0)]
+
+class PetCompositor:
+    def __init__(self, size=PET_SIZE, background=None, max_size=OUTFIT_CACHE_SIZE):
+        """
+        args:
+            size - tuple (width, height) of the baked pet
+            background - colour to bake the pet onto for an opaque (faster) blit, None keeps transparency
+            max_size - baked surfaces to keep before dropping the least recently used one
+        """
+        self.size = size
+        self.background = background
+        self.max_size = max_size
+        self.outfit = () #equipped accessory names, in the order they are layered
+        self.baked = OrderedDict() #(outfit, frame) -> surface, oldest first
+
+    def set_outfit(self, accessories):
+        #returns True if the pet looks different now
+        outfit = tuple(name for name in accessories if name in ACCESSORY_LAYOUT)
+        if outfit == self.outfit:
+            return False
+        self.outfit = outfit
+        return True
+
+    def image(self, frame=0):
+        #the pet wearing the current outfit, baked the first time it is asked for
+        key = (self.outfit, frame)
+        surface = self.baked.get(key)
+        if surface is not None:
+            self.baked.move_to_end(key)
+            return surface
+        surface = self.bake(frame)
+        self.baked[key] = surface
+        if len(self.baked) > self.max_size:
+            self.baked.popitem(last=False)
+        return surface
+
+    def bake(self, frame):
+        if self.background is None:
+            surface = pygame.Surface(self.size, pygame.SRCALPHA).convert_alpha()
+            surface.fill((0, 0, 0, 0))
+        else:
+            surface = pygame.Surface(self.size).convert()
+            surface.fill(self.background)
+        offset = FRAME_OFFSETS[frame % len(FRAME_OFFSETS)]
+        surface.blit(assets.get(PET_IMAGE, self.size), offset)
+        scale_x = self.size[0] / PET_SIZE[0]
+        scale_y = self.size[1] / PET_SIZE[1]
+        for name in self.outfit:
+            image_name, rect = ACCESSORY_LAYOUT[name]
+            size = (round(rect.width * scale_x), round(rect.height * scale_y))
+            position = (round(rect.x * scale_x) + offset[0], round(rect.y * scale_y) + offset[1])
+            surface.blit(assets.get(image_name, size), position)
+        return surface
+
+    def clear(self):
+        self.baked.clear()
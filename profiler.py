@@ -0,0 +1,177 @@
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+import pygame
+import pygame.freetype
+
+#frame timing built into the game loops, turned on with PYPAL_PROFILE=1
+#PYPAL_PROFILE_JSON=path also writes the run's stats to path when the game quits
+PROFILE_ENV = "PYPAL_PROFILE"
+PROFILE_JSON_ENV = "PYPAL_PROFILE_JSON"
+OVERLAY_KEY = pygame.K_F3
+
+HISTOGRAM_MS = 250 #frames are counted in 1ms buckets up to this, slower frames share the last bucket
+RECENT_FRAMES = 120 #frames the overlay averages over
+HITCH_FACTOR = 2.0 #a frame whose work takes this many times its budget counts as a hitch
+IDLE_PHASES = ("wait",) #phases spent sleeping rather than working, left out of a frame's work time
+
+OVERLAY_SIZE = 11
+OVERLAY_COLOR = (255, 255, 255)
+OVERLAY_BG = (0, 0, 0)
+
+class NullPhase:
+    #stands in for a phase timer when profiling is off
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+NULL_PHASE = NullPhase()
+
+#a run's worth of durations in 1ms buckets, so percentiles cost the same however long the game ran
+class Histogram:
+    def __init__(self, buckets=HISTOGRAM_MS):
+        self.counts = [0] * (buckets + 1)
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def add(self, ms):
+        self.counts[min(int(ms), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total += ms
+        self.worst = max(self.worst, ms)
+
+    def percentile(self, percent):
+        #upper edge of the bucket the percentile falls in, in ms
+        if not self.count:
+            return 0.0
+        wanted = self.count * percent / 100
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted:
+                return float(bucket + 1)
+        return float(len(self.counts))
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.worst,
+        }
+
+class FrameProfiler:
+    def __init__(self, enabled=False, budget_fps=60):
+        """
+        args:
+            enabled - when False every hook returns straight away
+            budget_fps - frame rate the hitch count is measured against
+        """
+        self.enabled = enabled
+        self.overlay = False #toggled with F3 while profiling
+        self.budget_fps = budget_fps
+        self.reset()
+
+    def reset(self):
+        self.frames = Histogram() #wall time from one frame to the next
+        self.work = Histogram() #frame time minus the idle phases
+        self.phases = {} #name -> Histogram
+        self.tracked = {} #name -> Histogram kept by someone else, eg input latency
+        self.frame_idle = 0.0
+        self.recent = deque(maxlen=RECENT_FRAMES)
+        self.hitches = 0
+        self.frame_start = None
+        self.overlay_font = None
+        self.overlay_rect = pygame.Rect(0, 0, 0, 0)
+
+    def begin_frame(self):
+        #call once at the top of every loop iteration, a frame runs until the next call
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            ms = (now - self.frame_start) * 1000
+            work = max(0.0, ms - self.frame_idle)
+            self.frames.add(ms)
+            self.work.add(work)
+            self.recent.append(work)
+            if work > HITCH_FACTOR * 1000 / self.budget_fps:
+                self.hitches += 1
+        self.frame_start = now
+        self.frame_idle = 0.0
+
+    def phase(self, name):
+        #times a block: with profiler.phase("draw"): ...
+        if not self.enabled:
+            return NULL_PHASE
+        return self.timed(name)
+
+    @contextmanager
+    def timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram = self.phases.get(name)
+            if histogram is None:
+                histogram = self.phases[name] = Histogram()
+            ms = (time.perf_counter() - start) * 1000
+            histogram.add(ms)
+            if name in IDLE_PHASES:
+                self.frame_idle += ms
+
+    def track(self, name, histogram):
+        #puts a Histogram filled in somewhere else into the stats
+        self.tracked[name] = histogram
+
+    def handle_event(self, event):
+        #F3 shows or hides the overlay, returns True when it did
+        if self.enabled and event.type == pygame.KEYDOWN and event.key == OVERLAY_KEY:
+            self.overlay = not self.overlay
+            return True
+        return False
+
+    def stats(self):
+        return {
+            "budget_fps": self.budget_fps,
+            "hitches": self.hitches,
+            "frames": self.frames.as_dict(),
+            "work": self.work.as_dict(),
+            "phases": {name: histogram.as_dict() for name, histogram in self.phases.items()},
+            "tracked": {name: histogram.as_dict() for name, histogram in self.tracked.items()},
+        }
+
+    def dump(self, path):
+        with open(path, "w") as file:
+            json.dump(self.stats(), file, indent=2)
+
+    def dump_if_requested(self):
+        #writes the stats to the file named by PYPAL_PROFILE_JSON, if profiling is on and one was given
+        path = os.environ.get(PROFILE_JSON_ENV)
+        if self.enabled and path:
+            self.dump(path)
+
+    def draw_overlay(self, surface, position=(4, 4)):
+        #draws recent frame times in a corner of surface, returns the area drawn on
+        if not (self.enabled and self.overlay):
+            return None
+        if self.overlay_font is None:
+            self.overlay_font = pygame.freetype.SysFont("Courier", OVERLAY_SIZE)
+        recent = sorted(self.recent)
+        if recent:
+            p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))]
+            text = "work %.1fms  p95 %.1fms  max %.1fms  hitches %d" % (
+                sum(recent) / len(recent), p95, recent[-1], self.hitches)
+        else:
+            text = "profiling..."
+        self.overlay_rect = self.overlay_font.render_to(surface, position, text, OVERLAY_COLOR, OVERLAY_BG)
+        return self.overlay_rect
+
+#shared by every loop in the game
+profiler = FrameProfiler(enabled=os.environ.get(PROFILE_ENV) == "1")
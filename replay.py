@@ -0,0 +1,125 @@
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from snake_logic import SnakeSim, OPPOSITE
+
+#snake game replays: the seed plus every tick's input, run length encoded
+#re-running them through SnakeSim gives back exactly the same game, so a claimed score can be checked
+REPLAY_MAGIC = b"PPRP"
+REPLAY_VERSION = 1
+REPLAY_HEADER = struct.Struct("<4sBHHQII") #magic, version, cols, rows, seed, ticks, final score
+MAX_BOARD_CELLS = 64 * 64 #biggest board a replay may ask for, the sim allocates per cell before reading any input
+
+#input codes, a run is stored as one varint: run length << 3 | code
+ACTION_CODES = {None: 0, 'UP': 1, 'DOWN': 2, 'LEFT': 3, 'RIGHT': 4}
+CODE_ACTIONS = {code: action for action, code in ACTION_CODES.items()}
+CODE_BITS = 3
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, at):
+    value = shift = 0
+    while True:
+        byte = data[at]
+        at += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, at
+        shift += 7
+
+#plays a SnakeSim while writing down its inputs
+class ReplayRecorder:
+    def __init__(self, sim):
+        """
+        args:
+            sim - a freshly reset SnakeSim, its seed goes into the replay
+        """
+        self.sim = sim
+        self.runs = [] #[code, count] pairs
+        self.ticks = 0
+
+    def step(self, action=None):
+        #same as sim.step, inputs that don't change anything are stored as no input so runs stay long
+        sim = self.sim
+        if not sim.alive:
+            return False
+        if action == sim.direction or (action is not None and action == OPPOSITE[sim.direction]):
+            action = None
+        alive = sim.step(action)
+        code = ACTION_CODES[action]
+        if self.runs and self.runs[-1][0] == code:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([code, 1])
+        self.ticks += 1
+        return alive
+
+    def encode(self):
+        sim = self.sim
+        out = bytearray(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, sim.cols, sim.rows, sim.seed,
+                                           self.ticks, sim.score))
+        for code, count in self.runs:
+            write_varint(out, count << CODE_BITS | code)
+        return bytes(out)
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.encode())
+
+def decode_header(data):
+    magic, version, cols, rows, seed, ticks, score = REPLAY_HEADER.unpack_from(data, 0)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError("not a version %d snake replay" % REPLAY_VERSION)
+    if cols < 1 or rows < 1 or cols * rows > MAX_BOARD_CELLS:
+        raise ValueError("bad board size %dx%d" % (cols, rows))
+    return cols, rows, seed, ticks, score
+
+def replay(data):
+    #re-runs a replay headlessly and returns the game's final SnakeState
+    cols, rows, seed, ticks, _ = decode_header(data)
+    sim = SnakeSim(cols, rows, seed)
+    step = sim.step
+    at = REPLAY_HEADER.size
+    played = 0
+    while at < len(data) and played < ticks:
+        value, at = read_varint(data, at)
+        action = CODE_ACTIONS[value & ((1 << CODE_BITS) - 1)]
+        count = value >> CODE_BITS
+        played += count
+        for _ in range(count):
+            if not step(action):
+                break
+        if not sim.alive:
+            break
+    return sim.snapshot()
+
+def verify(data):
+    #True if replaying gives the tick count and score the replay claims
+    #replays come from anywhere, so anything going wrong just means the replay doesn't check out
+    #and one bad replay never stops a verify_batch
+    try:
+        _, _, _, ticks, score = decode_header(data)
+        state = replay(data)
+    except Exception:
+        return False
+    return state.ticks == ticks and state.score == score
+
+def verify_batch(replays, workers=None, chunk_size=64):
+    #checks many replays over a process pool, returns a list of bools in the same order
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        return list(executor.map(verify, replays, chunksize=chunk_size))
+
+#python replay.py file... checks replay files
+if __name__ == "__main__":
+    paths = sys.argv[1:]
+    blobs = []
+    for path in paths:
+        with open(path, "rb") as file:
+            blobs.append(file.read())
+    for path, ok in zip(paths, verify_batch(blobs)):
+        print(path, "ok" if ok else "FAILED")
@@ -0,0 +1,245 @@
+import os
+import struct
+import zlib
+from care import MAX_NEED
+
+#save games: a compact snapshot file plus a journal of small changes appended after it
+#loading reads the snapshot and replays the journal on top. every journal record holds a value to set,
+#not a change to add, so replaying one twice (after a crash mid compaction) still gives the right state
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+SAVE_PATH = os.path.join(scriptDir, "save.dat")
+JOURNAL_SUFFIX = ".journal"
+COMPACT_BYTES = 64 * 1024 #journal size that triggers folding it into the snapshot
+
+SAVE_MAGIC = b"PPSV"
+SAVE_VERSION = 1
+SAVE_HEADER = struct.Struct("<4sHI") #magic, version, body length, then the body and a CRC32 of it
+CRC = struct.Struct("<I")
+PET = struct.Struct("<iiidq") #hunger, happiness, health, last care update, coins
+COUNT = struct.Struct("<H")
+SCORE = struct.Struct("<i")
+
+#journal records: RECORD header, payload, CRC32 of header + payload
+RECORD = struct.Struct("<BH") #kind, payload length
+CARE = 1 #payload: hunger, happiness, health, last update
+COINS = 2 #payload: coins
+ITEM_ADD = 3 #payload: accessory name
+ITEM_REMOVE = 4 #payload: accessory name
+HIGH_SCORE = 5 #payload: score then game name
+CARE_PAYLOAD = struct.Struct("<iiid")
+COINS_PAYLOAD = struct.Struct("<q")
+
+#everything that gets saved
+class SaveData:
+    def __init__(self):
+        self.hunger = MAX_NEED
+        self.happiness = MAX_NEED
+        self.health = MAX_NEED
+        self.last_update = None #wall clock time of the last care update, None for a new pet
+        self.coins = 0
+        self.inventory = set() #accessory names
+        self.high_scores = {} #mini-game name -> best score
+
+    def set_care(self, care):
+        #copies the needs out of a care.CareMeter
+        self.hunger = care.hunger
+        self.happiness = care.happiness
+        self.health = care.health
+        self.last_update = care.last_update
+
+def pack_string(text):
+    data = text.encode("utf-8")
+    return COUNT.pack(len(data)) + data
+
+def unpack_string(data, at):
+    (length,) = COUNT.unpack_from(data, at)
+    at += COUNT.size
+    return bytes(data[at:at + length]).decode("utf-8"), at + length
+
+def pack_snapshot(save):
+    last_update = -1.0 if save.last_update is None else save.last_update
+    parts = [PET.pack(save.hunger, save.happiness, save.health, last_update, save.coins)]
+    parts.append(COUNT.pack(len(save.inventory)))
+    parts.extend(pack_string(item) for item in sorted(save.inventory))
+    parts.append(COUNT.pack(len(save.high_scores)))
+    for game, score in sorted(save.high_scores.items()):
+        parts.append(SCORE.pack(score) + pack_string(game))
+    body = b"".join(parts)
+    return SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, len(body)) + body + CRC.pack(zlib.crc32(body))
+
+def unpack_snapshot(data):
+    #returns SaveData, or None if the data isn't a whole, undamaged snapshot
+    if len(data) < SAVE_HEADER.size:
+        return None
+    magic, version, length = SAVE_HEADER.unpack_from(data, 0)
+    if magic != SAVE_MAGIC or version != SAVE_VERSION or len(data) < SAVE_HEADER.size + length + CRC.size:
+        return None
+    body = data[SAVE_HEADER.size:SAVE_HEADER.size + length]
+    (crc,) = CRC.unpack_from(data, SAVE_HEADER.size + length)
+    if zlib.crc32(body) != crc:
+        return None
+    save = SaveData()
+    save.hunger, save.happiness, save.health, last_update, save.coins = PET.unpack_from(body, 0)
+    save.last_update = None if last_update < 0 else last_update
+    at = PET.size
+    (count,) = COUNT.unpack_from(body, at)
+    at += COUNT.size
+    for _ in range(count):
+        item, at = unpack_string(body, at)
+        save.inventory.add(item)
+    (count,) = COUNT.unpack_from(body, at)
+    at += COUNT.size
+    for _ in range(count):
+        (score,) = SCORE.unpack_from(body, at)
+        game, at = unpack_string(body, SCORE.size + at)
+        save.high_scores[game] = score
+    return save
+
+def pack_record(kind, payload):
+    header = RECORD.pack(kind, len(payload))
+    return header + payload + CRC.pack(zlib.crc32(header + payload))
+
+def apply_record(save, kind, payload):
+    if kind == CARE:
+        save.hunger, save.happiness, save.health, save.last_update = CARE_PAYLOAD.unpack(payload)
+    elif kind == COINS:
+        (save.coins,) = COINS_PAYLOAD.unpack(payload)
+    elif kind == ITEM_ADD:
+        save.inventory.add(payload.decode("utf-8"))
+    elif kind == ITEM_REMOVE:
+        save.inventory.discard(payload.decode("utf-8"))
+    elif kind == HIGH_SCORE:
+        (score,) = SCORE.unpack_from(payload, 0)
+        game = payload[SCORE.size:].decode("utf-8")
+        save.high_scores[game] = max(score, save.high_scores.get(game, score))
+
+def replay_journal(save, data):
+    #applies every whole record in data, returns how many bytes were good
+    #anything after the first torn or damaged record is from a crash mid write and is ignored
+    at = 0
+    while at + RECORD.size <= len(data):
+        kind, length = RECORD.unpack_from(data, at)
+        end = at + RECORD.size + length
+        if end + CRC.size > len(data):
+            break
+        (crc,) = CRC.unpack_from(data, end)
+        if zlib.crc32(data[at:end]) != crc:
+            break
+        apply_record(save, kind, data[at + RECORD.size:end])
+        at = end + CRC.size
+    return at
+
+def write_atomic(path, data):
+    #writes to a temporary file and renames it over path, so path is always either the old or the new file
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    sync_directory(os.path.dirname(os.path.abspath(path)))
+
+def sync_directory(directory):
+    #makes the rename itself survive a power cut, not every system can open a directory
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+#the save file and its journal on disk
+class SaveStore:
+    def __init__(self, path=SAVE_PATH, compact_bytes=COMPACT_BYTES):
+        """
+        args:
+            path - snapshot file, the journal sits next to it with JOURNAL_SUFFIX added
+            compact_bytes - journal size at which record() folds it into a new snapshot
+        """
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.compact_bytes = compact_bytes
+        self.save = SaveData()
+        self.journal = None
+        self.journal_size = 0
+
+    def load(self):
+        #reads the snapshot and replays the journal, a missing save gives a new pet
+        save = None
+        try:
+            with open(self.path, "rb") as file:
+                save = unpack_snapshot(file.read())
+        except OSError:
+            pass
+        self.save = save or SaveData()
+        good = 0
+        try:
+            with open(self.journal_path, "rb") as file:
+                good = replay_journal(self.save, file.read())
+        except OSError:
+            pass
+        #start appending right after the last good record, dropping any torn tail
+        self.close()
+        self.journal = open(self.journal_path, "ab")
+        self.journal.truncate(good)
+        self.journal_size = good
+        return self.save
+
+    def record(self, kind, payload):
+        #applies a change and appends it to the journal, only a few bytes are written
+        apply_record(self.save, kind, payload)
+        if self.journal is None:
+            self.journal = open(self.journal_path, "ab")
+        data = pack_record(kind, payload)
+        self.journal.write(data)
+        self.journal.flush()
+        self.journal_size += len(data)
+        if self.journal_size >= self.compact_bytes:
+            self.compact()
+
+    def record_care(self, care):
+        self.record(CARE, CARE_PAYLOAD.pack(care.hunger, care.happiness, care.health, care.last_update))
+
+    def record_coins(self, coins):
+        self.record(COINS, COINS_PAYLOAD.pack(coins))
+
+    def add_item(self, item):
+        self.record(ITEM_ADD, item.encode("utf-8"))
+
+    def buy_item(self, item, coins):
+        #coins is what is left after paying, both records go in together so a purchase is never half saved
+        self.record_coins(coins)
+        self.add_item(item)
+
+    def remove_item(self, item):
+        self.record(ITEM_REMOVE, item.encode("utf-8"))
+
+    def record_high_score(self, game, score):
+        if score > self.save.high_scores.get(game, -1):
+            self.record(HIGH_SCORE, SCORE.pack(score) + game.encode("utf-8"))
+
+    def compact(self):
+        #writes everything into a new snapshot with an atomic rename, then empties the journal
+        #a crash between the two steps just replays records the snapshot already has
+        write_atomic(self.path, pack_snapshot(self.save))
+        if self.journal is not None:
+            self.journal.truncate(0)
+            self.journal.flush()
+        else:
+            open(self.journal_path, "wb").close()
+        self.journal_size = 0
+
+    def sync(self):
+        #forces journal records written so far onto the disk
+        if self.journal is not None:
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
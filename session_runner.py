@@ -0,0 +1,204 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import signal
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from care import CareMeter, DEFAULT_RATES, MAX_NEED, TICK_SECONDS, UNITS
+from snake_logic import simulate, greedy_policy
+
+#simulated python pal sessions (snake rounds + the care meter going down) spread over every core, for balancing sweeps
+
+#knobs for one simulated session
+SessionConfig = namedtuple("SessionConfig", [
+    "rounds", #snake games played per session
+    "hours_between_rounds", #time the pet is left alone between games
+    "care_rates", #care.CareRates the pet's needs drop by
+    "coins_per_food", #coins paid for each food the snake eats
+    "food_price", #coins one pet food costs
+    "food_care", #hunger points one pet food gives back
+    "max_ticks", #longest a single snake game may run
+])
+DEFAULT_CONFIG = SessionConfig(10, 2.0, DEFAULT_RATES, 1, 3, 10.0, 5000)
+MAX_CARE = 100.0
+SHARDS_PER_WORKER = 4 #a few shards per worker so one slow shard doesn't leave the other cores idle at the end
+
+SessionResult = namedtuple("SessionResult", ["seed", "coins", "care", "health", "best_score", "ticks", "rounds"])
+
+def play_session(seed, config=DEFAULT_CONFIG):
+    #plays one whole session headlessly, the same seed always gives the same result
+    rng = random.Random(seed)
+    care = CareMeter(rates=config.care_rates, last_update=0)
+    care_ticks = int(config.hours_between_rounds * 3600 // TICK_SECONDS)
+    coins = 0
+    best_score = 0
+    ticks = 0
+    for _ in range(config.rounds):
+        state = simulate(greedy_policy, seed=rng.getrandbits(32), max_ticks=config.max_ticks)
+        coins += state.score * config.coins_per_food
+        best_score = max(best_score, state.score)
+        ticks += state.ticks
+        care.advance(care_ticks)
+        #spend coins on food while it wouldn't overfill the pet
+        while care.hunger + config.food_care * UNITS <= MAX_NEED and coins >= config.food_price:
+            coins -= config.food_price
+            care.feed(config.food_care)
+    return SessionResult(seed, coins, care.care, care.health / UNITS, best_score, ticks, config.rounds)
+
+#running totals over many sessions, cheap to send between processes and to merge
+class SessionStats:
+    def __init__(self):
+        self.sessions = 0
+        self.rounds = 0
+        self.ticks = 0
+        self.coins = 0
+        self.care = 0.0
+        self.min_care = MAX_CARE
+        self.best_score = 0
+        self.neglected = 0 #sessions that ended with the pet's health gone
+        self.seconds = 0.0 #time spent simulating
+
+    def add(self, result):
+        self.sessions += 1
+        self.rounds += result.rounds
+        self.ticks += result.ticks
+        self.coins += result.coins
+        self.care += result.care
+        self.min_care = min(self.min_care, result.care)
+        self.best_score = max(self.best_score, result.best_score)
+        if result.health <= 0:
+            self.neglected += 1
+
+    def merge(self, other):
+        self.sessions += other.sessions
+        self.rounds += other.rounds
+        self.ticks += other.ticks
+        self.coins += other.coins
+        self.care += other.care
+        self.min_care = min(self.min_care, other.min_care)
+        self.best_score = max(self.best_score, other.best_score)
+        self.neglected += other.neglected
+        self.seconds += other.seconds
+
+    def as_dict(self):
+        sessions = max(self.sessions, 1)
+        return {
+            "sessions": self.sessions,
+            "rounds": self.rounds,
+            "ticks": self.ticks,
+            "mean_coins": self.coins / sessions,
+            "mean_care": self.care / sessions,
+            "min_care": self.min_care,
+            "best_score": self.best_score,
+            "neglected": self.neglected,
+            "ticks_per_second": self.ticks / self.seconds if self.seconds else 0.0,
+        }
+
+#set in every worker process by init_worker, the parent sets it to stop the shards that are running
+cancel_event = None
+
+def run_shard(seeds, config):
+    #worker side: plays a slice of the sessions and returns (pid, stats)
+    #stops between sessions once the run is cancelled, the stats then only cover the sessions played
+    stats = SessionStats()
+    start = time.perf_counter()
+    for seed in seeds:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        stats.add(play_session(seed, config))
+    stats.seconds = time.perf_counter() - start
+    return os.getpid(), stats
+
+def init_worker(event):
+    global cancel_event
+    cancel_event = event
+    #ctrl+c goes to the parent, which decides how to shut the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def run_sessions(sessions, seed=0, workers=None, config=DEFAULT_CONFIG, shard_size=None, timeout=None):
+    """
+    plays sessions split into shards over a process pool
+
+    args:
+        sessions - how many sessions to play
+        seed - session i uses seed + i, so results don't depend on the number of workers
+        workers - processes to use, defaults to every core
+        config - SessionConfig for every session
+        shard_size - sessions sent to a worker at a time, defaults to SHARDS_PER_WORKER shards for every worker
+        timeout - seconds after which the run is cancelled, None to wait for all of it
+            shards that haven't started are dropped and running ones stop after their current session
+    returns:
+        (total SessionStats, {pid: SessionStats}, whether the run was cancelled)
+    """
+    total = SessionStats()
+    per_worker = {}
+    cancelled = False
+    workers = workers or os.cpu_count()
+    if shard_size is None:
+        shard_size = max(1, -(-sessions // (workers * SHARDS_PER_WORKER)))
+    seeds = range(seed, seed + sessions)
+    shards = [seeds[i:i + shard_size] for i in range(0, sessions, shard_size)]
+    deadline = None if timeout is None else time.monotonic() + timeout
+    cancel = multiprocessing.Event()
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(cancel,))
+
+    def collect(futures):
+        for future in futures:
+            if future.cancelled():
+                continue
+            pid, stats = future.result()
+            total.merge(stats)
+            per_worker.setdefault(pid, SessionStats()).merge(stats)
+
+    pending = set()
+    try:
+        pending = {executor.submit(run_shard, shard, config) for shard in shards}
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            collect(done)
+            if not done:
+                cancelled = True
+                break
+    except KeyboardInterrupt:
+        cancelled = True
+    finally:
+        if cancelled:
+            cancel.set()
+        #drops shards that haven't started, running ones stop after their current session and are waited for
+        executor.shutdown(wait=True, cancel_futures=True)
+    #the partial results of the shards that were running when the run was cancelled
+    collect(pending)
+    return total, per_worker, cancelled
+
+def main():
+    parser = argparse.ArgumentParser(description="Play simulated Python Pal sessions on every core.")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rounds", type=int, default=DEFAULT_CONFIG.rounds)
+    parser.add_argument("--timeout", type=float, default=None)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    config = DEFAULT_CONFIG._replace(rounds=args.rounds)
+    start = time.perf_counter()
+    total, per_worker, cancelled = run_sessions(args.sessions, args.seed, args.workers, config, timeout=args.timeout)
+    report = {
+        "config": dict(config._asdict(), care_rates=config.care_rates._asdict()),
+        "seed": args.seed,
+        "cancelled": cancelled,
+        "wall_seconds": time.perf_counter() - start,
+        "total": total.as_dict(),
+        "workers": {str(pid): stats.as_dict() for pid, stats in per_worker.items()},
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
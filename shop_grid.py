@@ -0,0 +1,113 @@
+from collections import namedtuple
+import pygame
+
+#scrolling grid of tiles that only keeps surfaces for the rows on screen
+#tiles that scroll out of view are kept as spares and drawn over for the items scrolling in
+TILE_GAP = 10
+
+#an accessory for sale, image is a file in graphics/
+ShopItem = namedtuple("ShopItem", ["name", "price", "image"])
+
+CATALOG = [
+    ShopItem("Heart Charm", 5, "Icon_Heart.png"),
+    ShopItem("Gold Medal", 12, "Icon_Award.png"),
+    ShopItem("Cosy House", 30, "Icon_Home.png"),
+    ShopItem("Diary", 8, "Icon_Writing.png"),
+    ShopItem("Full Battery", 6, "Icon_BatteryFull.png"),
+    ShopItem("Old Battery", 2, "Icon_BatteryLow.png"),
+]
+
+class VirtualGrid:
+    def __init__(self, rect, count, tile_size, render_tile, gap=TILE_GAP):
+        """
+        args:
+            rect - area of the screen the grid is shown in
+            count - number of items
+            tile_size - tuple (width, height) of one tile
+            render_tile - called with (tile surface, item index) to draw an item onto a tile
+            gap - pixels between tiles
+        """
+        self.rect = pygame.Rect(rect)
+        self.count = count
+        self.tile_width, self.tile_height = tile_size
+        self.render_tile = render_tile
+        self.gap = gap
+        self.columns = max(1, (self.rect.width + gap) // (self.tile_width + gap))
+        self.column_width = self.tile_width + gap
+        self.row_height = self.tile_height + gap
+        self.scroll = 0 #pixels scrolled down from the top
+        self.tiles = {} #item index -> tile surface showing it, only for visible items
+        self.spare = [] #tile surfaces not showing anything, reused before making new ones
+        self.stale = set() #visible items whose tile has to be drawn again
+        self.changed = True #something on the grid looks different since the last draw
+
+    @property
+    def rows(self):
+        return -(-self.count // self.columns)
+
+    @property
+    def max_scroll(self):
+        return max(0, self.rows * self.row_height - self.gap - self.rect.height)
+
+    def scroll_by(self, pixels):
+        #returns True if the grid moved
+        scroll = min(max(self.scroll + pixels, 0), self.max_scroll)
+        if scroll == self.scroll:
+            return False
+        self.scroll = scroll
+        self.changed = True
+        return True
+
+    def visible_range(self):
+        first_row = self.scroll // self.row_height
+        last_row = (self.scroll + self.rect.height - 1) // self.row_height
+        return range(first_row * self.columns, min(self.count, (last_row + 1) * self.columns))
+
+    def refresh(self, index):
+        #redraws an item's tile next frame, eg after its thumbnail loaded
+        if index in self.tiles:
+            self.stale.add(index)
+            self.changed = True
+
+    def tile_position(self, index):
+        row, column = divmod(index, self.columns)
+        return (self.rect.x + column * self.column_width, self.rect.y + row * self.row_height - self.scroll)
+
+    def index_at(self, pos):
+        #returns the item under pos, or None for gaps and empty space
+        if not self.rect.collidepoint(pos):
+            return None
+        x = pos[0] - self.rect.x
+        y = pos[1] - self.rect.y + self.scroll
+        column, column_x = divmod(x, self.column_width)
+        row, row_y = divmod(y, self.row_height)
+        if column >= self.columns or column_x >= self.tile_width or row_y >= self.tile_height:
+            return None
+        index = row * self.columns + column
+        return index if index < self.count else None
+
+    def sync(self):
+        #recycles tiles that left the view and fills tiles for items that came into it
+        visible = self.visible_range()
+        for index in [index for index in self.tiles if index not in visible]:
+            self.spare.append(self.tiles.pop(index))
+            self.stale.discard(index)
+        for index in visible:
+            tile = self.tiles.get(index)
+            if tile is None:
+                tile = self.spare.pop() if self.spare else pygame.Surface((self.tile_width, self.tile_height)).convert()
+                self.tiles[index] = tile
+                self.render_tile(tile, index)
+            elif index in self.stale:
+                self.render_tile(tile, index)
+        self.stale.clear()
+
+    def draw(self, surface, background):
+        #repaints the grid area onto surface, returns the rect that was drawn
+        self.sync()
+        surface.set_clip(self.rect)
+        surface.fill(background, self.rect)
+        surface.blits([(tile, self.tile_position(index)) for index, tile in self.tiles.items()], doreturn=False)
+        surface.set_clip(None)
+        self.changed = False
+        return self.rect
@@ -0,0 +1,123 @@
+import numpy as np
+from snake_logic import COLS, ROWS, DIRECTIONS, SnakeState
+
+#direction codes used by the batch, opposite directions differ only in the lowest bit
+ACTIONS = ('UP', 'DOWN', 'LEFT', 'RIGHT')
+KEEP = -1 #action that keeps the current direction
+DX = np.array([DIRECTIONS[name][0] for name in ACTIONS], dtype=np.int32)
+DY = np.array([DIRECTIONS[name][1] for name in ACTIONS], dtype=np.int32)
+FOOD_TRIES = 4 #random guesses per board before falling back to scanning its free cells
+
+#many independent snake games stepped together with numpy, same rules as snake_logic.SnakeSim
+#every board has a ring buffer body and an occupancy grid like SnakeBody, just stored as rows of 2d arrays
+class SnakeBatch:
+    def __init__(self, count, cols=COLS, rows=ROWS, seed=None):
+        """
+        args:
+            count - number of boards
+            cols - board width in cells
+            rows - board height in cells
+            seed - makes every board's food placement repeatable, None for random games
+        """
+        self.count = count
+        self.cols = cols
+        self.rows = rows
+        self.capacity = cols * rows
+        self.rng = np.random.default_rng(seed)
+        self.boards = np.arange(count)
+        self.bodies = np.zeros((count, self.capacity), dtype=np.int32) #cell indices, head at starts
+        self.grid = np.zeros((count, self.capacity), dtype=np.uint8) #1 where a segment is
+        self.starts = np.zeros(count, dtype=np.int32)
+        self.lengths = np.zeros(count, dtype=np.int32)
+        self.directions = np.zeros(count, dtype=np.int8)
+        self.food = np.zeros(count, dtype=np.int32) #cell index, -1 when the board is full
+        self.scores = np.zeros(count, dtype=np.int32)
+        self.ticks = np.zeros(count, dtype=np.int32)
+        self.alive = np.zeros(count, dtype=bool)
+        self.reset()
+
+    def reset(self, mask=None):
+        #starts new games on the boards picked by mask (all of them by default)
+        boards = self.boards if mask is None else self.boards[mask]
+        start = (self.rows // 2) * self.cols + self.cols // 2
+        self.grid[boards] = 0
+        self.grid[boards, start] = 1
+        self.starts[boards] = 0
+        self.bodies[boards, 0] = start
+        self.lengths[boards] = 1
+        self.directions[boards] = ACTIONS.index('RIGHT')
+        self.scores[boards] = 0
+        self.ticks[boards] = 0
+        self.alive[boards] = True
+        self.place_food(boards)
+
+    @property
+    def heads(self):
+        return self.bodies[self.boards, self.starts]
+
+    def place_food(self, boards):
+        #puts food on a random empty cell of each board in boards
+        #guessing is O(1) while boards are mostly empty, crowded boards fall back to a scan
+        pending = boards
+        for _ in range(FOOD_TRIES):
+            if len(pending) == 0:
+                return
+            guesses = self.rng.integers(0, self.capacity, size=len(pending))
+            free = self.grid[pending, guesses] == 0
+            self.food[pending[free]] = guesses[free]
+            pending = pending[~free]
+        for board in pending:
+            empty = np.flatnonzero(self.grid[board] == 0)
+            self.food[board] = self.rng.choice(empty) if len(empty) else -1
+
+    def step(self, actions=None):
+        #advances every live board one tick, actions holds a direction code or KEEP per board
+        #turning back into the snake is ignored, returns the alive mask
+        alive = self.alive
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int8)
+            turn = alive & (actions >= 0) & (actions != (self.directions ^ 1))
+            self.directions[turn] = actions[turn]
+        self.ticks[alive] += 1
+
+        heads = self.heads
+        col = heads % self.cols + DX[self.directions]
+        row = heads // self.cols + DY[self.directions]
+        in_bounds = (col >= 0) & (col < self.cols) & (row >= 0) & (row < self.rows)
+        new_heads = np.where(in_bounds, row * self.cols + col, 0)
+        ate = in_bounds & (new_heads == self.food)
+
+        #the tail moves out of the way this tick unless the snake is growing
+        tails_at = (self.starts + self.lengths - 1) % self.capacity
+        tails = self.bodies[self.boards, tails_at]
+        occupied = self.grid[self.boards, new_heads] == 1
+        hit_self = occupied & (ate | (new_heads != tails))
+        moving = alive & in_bounds & ~hit_self
+        self.alive = moving
+
+        popping = self.boards[moving & ~ate]
+        self.grid[popping, tails[popping]] = 0
+        self.lengths[popping] -= 1
+
+        movers = self.boards[moving]
+        self.starts[movers] = (self.starts[movers] - 1) % self.capacity
+        self.bodies[movers, self.starts[movers]] = new_heads[movers]
+        self.grid[movers, new_heads[movers]] = 1
+        self.lengths[movers] += 1
+
+        eaters = self.boards[moving & ate]
+        if len(eaters):
+            self.scores[eaters] += 1
+            self.place_food(eaters)
+            #the snake fills the whole board
+            self.alive[eaters[self.food[eaters] < 0]] = False
+        return self.alive
+
+    def snapshot(self, board):
+        #one board as a SnakeState, to compare against snake_logic.SnakeSim
+        at = (self.starts[board] + np.arange(self.lengths[board])) % self.capacity
+        body = tuple((int(i % self.cols), int(i // self.cols)) for i in self.bodies[board, at])
+        food = int(self.food[board])
+        food = None if food < 0 else (food % self.cols, food // self.cols)
+        return SnakeState(body, ACTIONS[self.directions[board]], food, int(self.scores[board]),
+                          int(self.ticks[board]), bool(self.alive[board]))
@@ -0,0 +1,50 @@
+import time
+from collections import deque, namedtuple
+from profiler import Histogram
+from snake_logic import OPPOSITE
+
+#turn presses waiting for the snake, one is used per tick so quick presses inside one tick all count
+INPUT_QUEUE_SIZE = 3 #presses buffered ahead, more than this and the snake would lag behind the keys
+
+#a buffered turn and when it was pressed (time.perf_counter())
+Turn = namedtuple("Turn", ["action", "pressed"])
+
+class InputQueue:
+    def __init__(self, size=INPUT_QUEUE_SIZE):
+        """
+        args:
+            size - most turns kept waiting, presses past this are dropped
+        """
+        self.turns = deque()
+        self.size = size
+        self.latency = Histogram() #ms from a press to the tick that used it
+        self.dropped = 0 #presses thrown away because the queue was full
+
+    def __len__(self):
+        return len(self.turns)
+
+    def push(self, action, heading, now=None):
+        #queues a turn, heading is the direction the snake is going right now
+        #turns are checked against the last queued one, so UP then LEFT while going RIGHT both happen
+        #instead of the second one reversing into the body, returns whether the turn was queued
+        last = self.turns[-1].action if self.turns else heading
+        if action == last or action == OPPOSITE[last]:
+            return False
+        if len(self.turns) >= self.size:
+            self.dropped += 1
+            return False
+        self.turns.append(Turn(action, time.perf_counter() if now is None else now))
+        return True
+
+    def pop(self, now=None):
+        #the turn for this tick, or None to keep going straight
+        if not self.turns:
+            return None
+        turn = self.turns.popleft()
+        if now is None:
+            now = time.perf_counter()
+        self.latency.add((now - turn.pressed) * 1000)
+        return turn.action
+
+    def clear(self):
+        self.turns.clear()
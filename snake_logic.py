@@ -0,0 +1,237 @@
+import random
+from array import array
+from collections import namedtuple
+
+#board size in cells for the snake mini-game (800x600 window, 20px cells)
+COLS = 40
+ROWS = 30
+
+#how each direction moves the head, in cells
+DIRECTIONS = {
+    'UP': (0, -1),
+    'DOWN': (0, 1),
+    'LEFT': (-1, 0),
+    'RIGHT': (1, 0),
+}
+OPPOSITE = {'UP': 'DOWN', 'DOWN': 'UP', 'LEFT': 'RIGHT', 'RIGHT': 'LEFT'}
+
+def next_cell(cell, direction):
+    #returns the cell one step away from cell in the given direction
+    dx, dy = DIRECTIONS[direction]
+    return (cell[0] + dx, cell[1] + dy)
+
+#every empty cell on the board, kept in a swap-remove array so adding, removing and picking one are O(1)
+class FreeCells:
+    def __init__(self, size):
+        """
+        args:
+            size - number of cells on the board, all of them start free
+        """
+        self.cells = array('i', range(size)) #the first self.count entries are the free cells
+        self.position = array('i', range(size)) #where each cell sits in self.cells
+        self.count = size
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, index):
+        return self.position[index] < self.count
+
+    def remove(self, index):
+        #swaps the cell with the last free one and shrinks the free part
+        pos = self.position[index]
+        last = self.count - 1
+        last_index = self.cells[last]
+        self.cells[pos] = last_index
+        self.position[last_index] = pos
+        self.cells[last] = index
+        self.position[index] = last
+        self.count = last
+
+    def add(self, index):
+        #swaps the cell to just past the free part and grows it
+        pos = self.position[index]
+        first_taken = self.count
+        other = self.cells[first_taken]
+        self.cells[pos] = other
+        self.position[other] = pos
+        self.cells[first_taken] = index
+        self.position[index] = first_taken
+        self.count += 1
+
+    def choice(self, rng):
+        #returns a random free cell index, or None if the board is full
+        if self.count == 0:
+            return None
+        return self.cells[rng.randrange(self.count)]
+
+#snake segments kept in a fixed size ring buffer with an occupancy grid, so every operation is O(1)
+class SnakeBody:
+    def __init__(self, start, cols=COLS, rows=ROWS):
+        """
+        args:
+            start - tuple (col, row) of the first segment
+            cols - board width in cells
+            rows - board height in cells
+        """
+        self.cols = cols
+        self.rows = rows
+        self.capacity = cols * rows
+        self.cells = array('i', bytes(4 * self.capacity)) #cell indices, head at self.start
+        self.grid = bytearray(self.capacity) #1 where a segment is
+        self.free = FreeCells(self.capacity) #every cell the snake isn't on
+        self.start = 0
+        self.length = 0
+        self.push_head(self.index(start))
+
+    def index(self, cell):
+        #turns (col, row) into a flat grid index
+        return cell[1] * self.cols + cell[0]
+
+    def cell(self, index):
+        #turns a flat grid index back into (col, row)
+        return (index % self.cols, index // self.cols)
+
+    def in_bounds(self, cell):
+        return 0 <= cell[0] < self.cols and 0 <= cell[1] < self.rows
+
+    @property
+    def head(self):
+        return self.cell(self.cells[self.start])
+
+    @property
+    def tail(self):
+        return self.cell(self.cells[(self.start + self.length - 1) % self.capacity])
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        #yields the segments from head to tail as (col, row)
+        for i in range(self.length):
+            yield self.cell(self.cells[(self.start + i) % self.capacity])
+
+    def __contains__(self, cell):
+        return self.in_bounds(cell) and self.grid[self.index(cell)] == 1
+
+    def push_head(self, index):
+        self.start = (self.start - 1) % self.capacity
+        self.cells[self.start] = index
+        self.grid[index] = 1
+        self.free.remove(index)
+        self.length += 1
+
+    def pop_tail(self):
+        #removes the last segment and returns its grid index
+        self.length -= 1
+        index = self.cells[(self.start + self.length) % self.capacity]
+        self.grid[index] = 0
+        self.free.add(index)
+        return index
+
+    def move(self, cell, grow=False):
+        #moves the head onto cell, keeping the tail when growing
+        #returns False (and leaves the snake alone) if that would hit a wall or the snake itself
+        if not self.in_bounds(cell):
+            return False
+        index = self.index(cell)
+        if self.grid[index]:
+            #the tail moves out of the way this tick unless the snake is growing
+            tail_index = self.cells[(self.start + self.length - 1) % self.capacity]
+            if grow or index != tail_index:
+                return False
+        if not grow:
+            self.pop_tail()
+        self.push_head(index)
+        return True
+
+    def random_free_cell(self, rng):
+        #returns a random (col, row) the snake isn't on, or None if the snake fills the board
+        index = self.free.choice(rng)
+        if index is None:
+            return None
+        return self.cell(index)
+
+#read only copy of a game, body is head first
+SnakeState = namedtuple("SnakeState", ["body", "direction", "food", "score", "ticks", "alive"])
+
+#the whole snake mini-game with no pygame in it, so it can be stepped as fast as python goes
+class SnakeSim:
+    def __init__(self, cols=COLS, rows=ROWS, seed=None):
+        """
+        args:
+            cols - board width in cells
+            rows - board height in cells
+            seed - makes food placement repeatable, None for a random game
+        """
+        self.cols = cols
+        self.rows = rows
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        #starts a new game in the middle of the board heading right
+        #a random game still gets a seed of its own so it can be replayed
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.snake = SnakeBody((self.cols // 2, self.rows // 2), self.cols, self.rows)
+        self.direction = 'RIGHT'
+        self.food = self.snake.random_free_cell(self.rng)
+        self.score = 0 #food eaten
+        self.ticks = 0
+        self.alive = True
+
+    def step(self, action=None):
+        #advances one tick, action is a new direction or None to keep going
+        #turning back into the snake is ignored, returns whether the game is still going
+        if not self.alive:
+            return False
+        if action is not None and action != OPPOSITE[self.direction]:
+            self.direction = action
+        self.ticks += 1
+        new_head = next_cell(self.snake.head, self.direction)
+        ate = new_head == self.food
+        if not self.snake.move(new_head, grow=ate):
+            self.alive = False
+        elif ate:
+            self.score += 1
+            self.food = self.snake.random_free_cell(self.rng)
+            if self.food is None:
+                self.alive = False #the snake fills the whole board
+        return self.alive
+
+    def snapshot(self):
+        return SnakeState(tuple(self.snake), self.direction, self.food, self.score, self.ticks, self.alive)
+
+def simulate(policy, seed=None, max_ticks=10000, cols=COLS, rows=ROWS):
+    #plays one game headlessly and returns its final state
+    #policy is called with the sim every tick and returns a direction or None
+    sim = SnakeSim(cols, rows, seed)
+    while sim.ticks < max_ticks and sim.step(policy(sim)):
+        pass
+    return sim.snapshot()
+
+def greedy_policy(sim):
+    #simple bot: heads for the food along whichever axis is further away, without walking into a wall or itself
+    head = sim.snake.head
+    wanted = []
+    if sim.food is not None:
+        dx = sim.food[0] - head[0]
+        dy = sim.food[1] - head[1]
+        horizontal = 'RIGHT' if dx > 0 else 'LEFT'
+        vertical = 'DOWN' if dy > 0 else 'UP'
+        if dx and dy:
+            wanted = [horizontal, vertical] if abs(dx) >= abs(dy) else [vertical, horizontal]
+        elif dx:
+            wanted = [horizontal]
+        elif dy:
+            wanted = [vertical]
+    tail = sim.snake.tail
+    for direction in wanted + [sim.direction] + list(DIRECTIONS):
+        if direction == OPPOSITE[sim.direction]:
+            continue
+        cell = next_cell(head, direction)
+        if sim.snake.in_bounds(cell) and (cell not in sim.snake or cell == tail):
+            return direction
+    return None
@@ -0,0 +1,79 @@
+import pygame
+from minigame import MiniGame
+from profiler import profiler
+from replay import ReplayRecorder
+from snake_input import InputQueue
+from snake_logic import SnakeSim
+from snake_render import CELL_SIZE, load_snake_image, BoardRenderer
+
+#the snake game as a mini-game, played on whatever surface the host hands it
+TICKS_PER_SECOND = 10 #snake speed, the rules only ever see whole ticks
+MAX_CATCH_UP = 5 #most ticks run in one update after a stall, the rest of the stall is skipped
+
+#arrow keys and the direction they turn the snake
+KEYS = {
+    pygame.K_UP: 'UP',
+    pygame.K_DOWN: 'DOWN',
+    pygame.K_LEFT: 'LEFT',
+    pygame.K_RIGHT: 'RIGHT',
+}
+
+class SnakeMiniGame(MiniGame):
+    def __init__(self, cell_size=CELL_SIZE, ticks_per_second=TICKS_PER_SECOND):
+        """
+        args:
+            cell_size - pixels per board cell, the board is as many cells as fit on the surface
+            ticks_per_second - snake speed
+        """
+        self.cell_size = cell_size
+        self.tick_time = 1 / ticks_per_second
+        self.snake_image = load_snake_image(cell_size)
+        self.sim = None
+
+    def init(self, surface, seed=None):
+        """
+        args:
+            surface - where the board is drawn
+            seed - makes food placement repeatable, None for a random game
+        """
+        cols = surface.get_width() // self.cell_size
+        rows = surface.get_height() // self.cell_size
+        self.sim = SnakeSim(cols, rows, seed)
+        #every game is recorded so it can be saved and checked with replay.py
+        self.recorder = ReplayRecorder(self.sim)
+        #turns pressed between ticks wait here, the snake takes one per tick
+        self.inputs = InputQueue()
+        profiler.track("input_latency", self.inputs.latency)
+        self.board = BoardRenderer(surface, self.snake_image, self.cell_size)
+        self.behind = 0.0 #seconds of game time still to be ticked
+        self.previous = (self.sim.snake.head, self.sim.snake.tail) #head and tail before the last tick
+
+    @property
+    def score(self):
+        #food eaten this round
+        return self.sim.score
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key in KEYS:
+            self.inputs.push(KEYS[event.key], self.sim.direction)
+
+    def update(self, dt):
+        #ticks on a fixed clock whatever the frame rate, the game ends if the snake hits a wall or itself
+        self.behind = min(self.behind + dt, MAX_CATCH_UP * self.tick_time)
+        sim = self.sim
+        while sim.alive and self.behind >= self.tick_time:
+            self.behind -= self.tick_time
+            self.previous = (sim.snake.head, sim.snake.tail)
+            self.recorder.step(self.inputs.pop())
+        return sim.alive
+
+    def draw(self):
+        #only the cells that changed, with the snake slid part way into its next tick
+        return self.board.draw(self.sim, self.previous, self.behind / self.tick_time)
+
+    def invalidate(self):
+        self.board.invalidate()
+
+    def teardown(self):
+        #the board holds on to the host's surface, which may not outlive the round
+        self.board = None
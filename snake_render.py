@@ -0,0 +1,124 @@
+from itertools import islice
+import pygame
+from assets import assets
+
+#drawing for the snake mini-game, kept apart from snake_logic so the game can run without a display
+CELL_SIZE = 20
+
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+
+def load_snake_image(cell_size=CELL_SIZE):
+    #needs a display mode to be set first
+    return assets.get("snakey.png", (cell_size, cell_size))
+
+def to_pixels(cell, cell_size=CELL_SIZE):
+    return (cell[0] * cell_size, cell[1] * cell_size)
+
+def between_pixels(start, end, alpha, cell_size=CELL_SIZE):
+    #alpha of the way from cell start to cell end, in pixels
+    return (round((start[0] + (end[0] - start[0]) * alpha) * cell_size),
+            round((start[1] + (end[1] - start[1]) * alpha) * cell_size))
+
+def draw_snake(screen, snake_image, snake):
+    for segment in snake:
+        screen.blit(snake_image, to_pixels(segment))
+
+def draw_food(screen, food_position):
+    pygame.draw.rect(screen, RED, (*to_pixels(food_position), CELL_SIZE, CELL_SIZE))
+
+#draws the board onto a screen that keeps last frame's pixels, repainting only the cells that changed
+#a tick changes at most the old head, the old tail and the food, so a frame costs the same for any snake length
+class BoardRenderer:
+    def __init__(self, screen, snake_image, cell_size=CELL_SIZE, background=BLACK):
+        """
+        args:
+            screen - surface the board is drawn on, nothing else should draw over the board
+            snake_image - surface for one segment, cell_size square
+            cell_size - pixels per cell
+            background - colour of empty cells
+        """
+        self.screen = screen
+        self.snake_image = snake_image
+        self.cell_size = cell_size
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self.background.fill(background)
+        self.food_image = pygame.Surface((cell_size, cell_size)).convert()
+        self.food_image.fill(RED)
+        self.full_redraw = True
+        #what the screen shows right now
+        self.sim = None
+        self.ticks = 0
+        self.head = self.tail = self.food = None
+        self.moving = [] #rects of the sliding head and tail, erased next frame
+
+    def invalidate(self):
+        #repaints the whole board next frame, eg after something else drew over it
+        self.full_redraw = True
+
+    def cell_rect(self, cell):
+        size = self.cell_size
+        return pygame.Rect(cell[0] * size, cell[1] * size, size, size)
+
+    def cells_under(self, rect):
+        size = self.cell_size
+        for x in range(rect.left // size, (rect.right - 1) // size + 1):
+            for y in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield (x, y)
+
+    def paint_cell(self, blits, snake, food, cell, static_head):
+        #queues what belongs in one cell, leaving out the head when it is drawn sliding
+        rect = self.cell_rect(cell)
+        blits.append((self.background, rect, rect))
+        if snake.in_bounds(cell) and cell in snake and (static_head or cell != snake.head):
+            blits.append((self.snake_image, rect))
+        if cell == food:
+            blits.append((self.food_image, rect))
+        return rect
+
+    def draw(self, sim, previous=None, alpha=1.0):
+        #draws sim and returns the list of rects that changed, for pygame.display.update
+        #previous is (head, tail) before the last tick and alpha how far the frame is into the next tick,
+        #only the ends move: the head slides out of its old cell and the old tail slides onto the new tail
+        #leave previous out to draw the snake sitting in its cells
+        snake = sim.snake
+        static_head = previous is None
+        blits = []
+        dirty = []
+        if self.full_redraw or sim is not self.sim or not self.ticks <= sim.ticks <= self.ticks + 1:
+            blits.append((self.background, (0, 0)))
+            segments = snake if static_head else islice(snake, 1, None)
+            blits.extend((self.snake_image, to_pixels(segment, self.cell_size)) for segment in segments)
+            if sim.food is not None:
+                blits.append((self.food_image, to_pixels(sim.food, self.cell_size)))
+            dirty.append(self.screen.get_rect())
+        else:
+            cells = {snake.head}
+            if sim.ticks != self.ticks:
+                cells.add(self.head)
+                cells.add(self.tail)
+            if sim.food != self.food:
+                cells.add(self.food)
+                cells.add(sim.food)
+            cells.discard(None)
+            for rect in self.moving:
+                cells.update(self.cells_under(rect))
+                dirty.append(rect)
+            for cell in cells:
+                dirty.append(self.paint_cell(blits, snake, sim.food, cell, static_head))
+        self.moving = []
+        if not static_head:
+            old_head, old_tail = previous
+            for start, end in ((old_tail, snake.tail), (old_head, snake.head)):
+                position = between_pixels(start, end, alpha, self.cell_size)
+                blits.append((self.snake_image, position))
+                self.moving.append(pygame.Rect(position, (self.cell_size, self.cell_size)))
+            dirty.extend(self.moving)
+        self.screen.blits(blits, doreturn=False)
+        self.full_redraw = False
+        self.sim = sim
+        self.ticks = sim.ticks
+        self.head = snake.head
+        self.tail = snake.tail
+        self.food = sim.food
+        return dirty